@@ -1,26 +1,49 @@
+from array import array
+
+# Checkpoint slots of Container.checkpoints, in chronological order. A slot holds NaN until set.
+CHECKPOINTS = (
+    "vessel_scheduled_arrival",
+    "vessel_arrives",
+    "vessel_berths",
+    "entered_yard",
+    "retrieval_ready",
+    "waiting_for_inland_tsp",
+    "loaded_for_transport",
+    "departed_port",
+)
+(VESSEL_SCHEDULED_ARRIVAL, VESSEL_ARRIVES, VESSEL_BERTHS, ENTERED_YARD, RETRIEVAL_READY,
+ WAITING_FOR_INLAND_TSP, LOADED_FOR_TRANSPORT, DEPARTED_PORT) = range(len(CHECKPOINTS))
+
+_UNSET = array("d", [float("nan")] * len(CHECKPOINTS))
+
 class Container:
     """
     Represents a container in the simulation.
-    
-    Checkpoints:
-        - vessel: the vessel that delivered the container.
-        - vessel_scheduled_arrival: when the vessel was scheduled to arrive.
-        - vessel_arrives: when the vessel actually arrived.
-        - vessel_berths: when the vessel berths.
-        - entered_yard: when the container enters the yard.
-        - retrieval_ready: when the container is ready for retrieval.
-        - waiting_for_inland_tsp: when retrieval is complete (container waiting for inland transport).
-        - loaded_for_transport: when the container is loaded onto its transport.
-        - departed_port: when the container departs the port.
+
+    vessel is the name of the vessel that delivered the container ("Initial" for yard stock).
+    checkpoints is a fixed-schema array of float64 times, indexed by the constants above:
+        - VESSEL_SCHEDULED_ARRIVAL: when the vessel was scheduled to arrive.
+        - VESSEL_ARRIVES: when the vessel actually arrived.
+        - VESSEL_BERTHS: when the vessel berths.
+        - ENTERED_YARD: when the container enters the yard.
+        - RETRIEVAL_READY: when the container is ready for retrieval.
+        - WAITING_FOR_INLAND_TSP: when retrieval is complete (container waiting for inland transport).
+        - LOADED_FOR_TRANSPORT: when the container is loaded onto its transport.
+        - DEPARTED_PORT: when the container departs the port.
     """
+    __slots__ = ("container_id", "category", "is_initial", "mode", "vessel", "checkpoints")
+
     def __init__(self, container_id, category="ANY", is_initial=False):
         self.container_id = container_id
         self.category = category
         self.is_initial = is_initial
         self.mode = None
-        self.checkpoints = {}  # Expected keys: 'vessel', 'vessel_scheduled_arrival', 'vessel_arrives', 'vessel_berths', 'entered_yard', 'retrieval_ready', 'waiting_for_inland_tsp', 'loaded_for_transport', 'departed_port'
+        self.vessel = None
+        self.checkpoints = array("d", _UNSET)
 
     def __str__(self):
         init_status = "Initial" if self.is_initial else "Arrived"
+        times = ", ".join(f"{name}={time:.2f}" for name, time in zip(CHECKPOINTS, self.checkpoints)
+                          if time == time)
         return (f"Container(id={self.container_id}, category={self.category}, {init_status}, "
-                f"mode={self.mode}, checkpoints={self.checkpoints})")
+                f"mode={self.mode}, vessel={self.vessel}, {times})")
@@ -2,7 +2,72 @@
 
 import random
 random.seed(42)
+from collections import deque
 import simpy
+from container import DEPARTED_PORT, LOADED_FOR_TRANSPORT
+
+class ContainerQueue:
+    """
+    FIFO queue of containers waiting for inland transport. Like a simpy.Store, processes block on
+    get() until a container is available, but the items sit in a deque and one get can take
+    several containers at once. append() and len() work as they did on the former list.
+    """
+    def __init__(self, env):
+        self.env = env
+        self.items = deque()
+        self._getters = deque()  # (event, max_items) in request order
+
+    def __len__(self):
+        return len(self.items)
+
+    def append(self, container):
+        self.items.append(container)
+        self._serve()
+
+    def extend(self, containers):
+        self.items.extend(containers)
+        self._serve()
+
+    def requeue(self, containers):
+        """Put containers back at the front of the queue, in their original order."""
+        self.items.extendleft(reversed(containers))
+        self._serve()
+
+    def take(self, max_items):
+        """Remove and return up to max_items containers without waiting, oldest first."""
+        items = self.items
+        return [items.popleft() for _ in range(min(max_items, len(items)))]
+
+    def get(self, max_items=1):
+        """Event that succeeds with a list of 1 to max_items containers, oldest first."""
+        event = self.env.event()
+        self._getters.append((event, max_items))
+        self._serve()
+        return event
+
+    def _serve(self):
+        items = self.items
+        while self._getters and items:
+            event, max_items = self._getters.popleft()
+            event.succeed([items.popleft() for _ in range(min(max_items, len(items)))])
+
+class CompletionTracker:
+    """
+    Counts the containers still in the port (initial yard stock plus every vessel's load) and
+    succeeds the done event, with the time, the moment the last one departs. The run can then
+    stop exactly there instead of checking yards and queues every hour.
+    """
+    def __init__(self, env, in_flight):
+        self.env = env
+        self.in_flight = in_flight
+        self.done = env.event()
+        if in_flight == 0:
+            self.done.succeed(env.now)
+
+    def departed(self, count=1):
+        self.in_flight -= count
+        if self.in_flight == 0:
+            self.done.succeed(self.env.now)
 
 def parse_operating_hours(operating_hours_dict):
     """
@@ -22,58 +87,81 @@ def parse_operating_hours(operating_hours_dict):
     end_hour = float(end_parts[0]) + float(end_parts[1]) / 60.0
     return start_hour, end_hour
 
-def truck_departure_process(env, truck_queue, gate_resource, truck_processing_params, op_hours, metrics=None):
+def hours_until_open(now, start_hour, end_hour):
+    """
+    Return 0 if the gate is open at time now, else the hours until it next opens.
+    """
+    current_hour = now % 24
+    if start_hour <= current_hour < end_hour:
+        return 0
+    if current_hour < start_hour:
+        return start_hour - current_hour
+    return 24 - current_hour + start_hour
+
+def truck_departure_process(env, truck_queue, truck_processing_params, start_hour, end_hour,
+                            containers_per_truck=2, metrics=None, completion=None):
     """
-    Continuously processes truck departures.
+    One gate lane. While the gate is open, waits on the truck queue without polling, takes up
+    to containers_per_truck containers for one truck and processes it.
     
-    - Checks that current simulation time is within operating hours.
-    - Processes up to 2 containers at a time using a gate resource.
-    - For each container, records:
+    For each container, records:
         - "loaded_for_transport": when the container is loaded onto a truck.
         - "departed_port": when the container departs (after processing delay).
     """
-    # Parse operating hours from config (e.g., {"start": "06:00", "end": "17:00"})
-    start_hour, end_hour = parse_operating_hours(op_hours)
-
     while True:
-        current_hour = env.now % 24
-        if not (start_hour <= current_hour < end_hour):
-            if current_hour < start_hour:
-                wait_time = start_hour - current_hour
-            else:
-                wait_time = 24 - current_hour + start_hour
+        wait_time = hours_until_open(env.now, start_hour, end_hour)
+        if wait_time > 0:
             yield env.timeout(wait_time)
             continue
 
-        if len(truck_queue) == 0:
-            yield env.timeout(0.1)
+        containers = yield truck_queue.get(containers_per_truck)
+        if hours_until_open(env.now, start_hour, end_hour) > 0:
+            # The gate closed while this lane waited; leave the containers for the next opening.
+            truck_queue.requeue(containers)
             continue
 
-        with gate_resource.request() as req:
-            yield req
-            num_to_process = min(2, len(truck_queue))
-            containers = [truck_queue.pop(0) for _ in range(num_to_process)]
-            processing_time_minutes = random.triangular(
-                truck_processing_params["min"],
-                truck_processing_params["max"],
-                truck_processing_params["mode"]
-            )
-            processing_time = processing_time_minutes / 60.0
-            # Set loaded_for_transport for each container.
-            for container in containers:
-                container.checkpoints["loaded_for_transport"] = env.now
-            yield env.timeout(processing_time)
-            # After processing, set departed_port checkpoint.
-            for container in containers:
-                container.checkpoints["departed_port"] = env.now
-                # Now record the container's final state.
-                if metrics is not None:
-                    metrics.record_container_departure(container)
-
-def train_departure_process(env, train_queue, trains_per_day, train_capacity, metrics=None):
+        processing_time_minutes = random.triangular(
+            truck_processing_params["min"],
+            truck_processing_params["max"],
+            truck_processing_params["mode"]
+        )
+        processing_time = processing_time_minutes / 60.0
+        # Set loaded_for_transport for each container.
+        for container in containers:
+            container.checkpoints[LOADED_FOR_TRANSPORT] = env.now
+        yield env.timeout(processing_time)
+        # After processing, set departed_port checkpoint.
+        for container in containers:
+            container.checkpoints[DEPARTED_PORT] = env.now
+            # Now record the container's final state.
+            if metrics is not None:
+                metrics.record_container_departure(container)
+        if completion is not None:
+            completion.departed(len(containers))
+
+def start_gate_lanes(env, truck_queue, gate_config, metrics=None, completion=None):
+    """
+    Start one truck_departure_process per gate, so number_of_gates sets how many trucks are
+    processed in parallel. gate_config is the "gate" section of the simulation config;
+    "containers_per_truck" defaults to 2.
+    
+    Returns:
+        list: The lane processes.
+    """
+    start_hour, end_hour = parse_operating_hours(gate_config["operating_hours"])
+    containers_per_truck = gate_config.get("containers_per_truck", 2)
+    return [env.process(truck_departure_process(env, truck_queue, gate_config["truck_processing_time"],
+                                                start_hour, end_hour, containers_per_truck, metrics,
+                                                completion))
+            for _ in range(gate_config["number_of_gates"])]
+
+def train_departure_process(env, train_queue, trains_per_day, train_capacity, metrics=None,
+                            completion=None):
     """
     Continuously schedules train departures at fixed intervals and processes up to train_capacity containers per departure.
     
+    Each train takes its batch from the front of the queue in one O(capacity) slice, stamps both
+    checkpoints in one pass and hands the whole batch to the metrics at once.
     For each container processed, records:
         - "loaded_for_transport": timestamp when container is loaded onto a train.
         - "departed_port": timestamp when container departs.
@@ -82,14 +170,16 @@ def train_departure_process(env, train_queue, trains_per_day, train_capacity, me
     next_departure = env.now
     while True:
         yield env.timeout(max(0, next_departure - env.now))
-        if train_queue:
-            num_to_process = min(train_capacity, len(train_queue))
-            departing_containers = [train_queue.pop(0) for _ in range(num_to_process)]
-            for container in departing_containers:
-                container.checkpoints["loaded_for_transport"] = env.now
+        departing_containers = train_queue.take(train_capacity)
+        if departing_containers:
             # For simplicity, assume departure is instantaneous.
+            now = env.now
             for container in departing_containers:
-                container.checkpoints["departed_port"] = env.now
-                if metrics is not None:
-                    metrics.record_container_departure(container)
+                checkpoints = container.checkpoints
+                checkpoints[LOADED_FOR_TRANSPORT] = now
+                checkpoints[DEPARTED_PORT] = now
+            if metrics is not None:
+                metrics.record_container_departures(departing_containers)
+            if completion is not None:
+                completion.departed(len(departing_containers))
         next_departure += departure_interval
@@ -14,18 +14,15 @@ def load_config(file_path):
 from vessel import Vessel
 from berth import BerthManager
 from unloading import unload_vessel
-from yard import Yard
+from yard import Yard, YardSystem
 from container import Container
-from departure import truck_departure_process, train_departure_process
+from departure import CompletionTracker, ContainerQueue, start_gate_lanes, train_departure_process
 from metrics import Metrics
 
-class Termination(Exception):
-    pass
-
-def main(progress_callback=None):
+def main(progress_callback=None, config_path="config_exp.jsonc"):
     random.seed(42)
     env = simpy.Environment()
-    config = load_config("config_exp.jsonc")
+    config = load_config(config_path)
     sim_config = config["simulation"]
     metrics = Metrics()
     
@@ -39,14 +36,18 @@ def main(progress_callback=None):
     container_categories = sim_config["yard"]["container_categories"]
     yard_mapping = sim_config["yard"]["yard_mapping"]
     retrieval_delay_per_move = sim_config["yard"]["retrieval_delay_per_move"]
-    yards = {}
+    category_yards = {}
+    first_container_id = 0
     for category in container_categories:
         mapping = yard_mapping.get(category, {})
         capacity = mapping.get("capacity", 10000)
         initial_containers = mapping.get("initial_containers", 0)
-        yards[category] = Yard(env, capacity, retrieval_delay_per_move, initial_containers)
+        category_yards[category] = Yard(env, capacity, retrieval_delay_per_move, initial_containers,
+                                        category, first_container_id)
+        first_container_id += initial_containers
         # Initial containers already have their checkpoints set in Yard
-    total_initial = sum(yard.get_occupancy() for yard in yards.values())
+    yards = YardSystem(env, category_yards)
+    total_initial = yards.occupancy
     metrics.record_yard_utilization(0, "all", total_initial)
     metrics.total_initial = total_initial  # For later use in summarizing departures
     
@@ -56,28 +57,34 @@ def main(progress_callback=None):
         for container in yards[category].containers:
             container.mode = "Rail" if random.random() < train_percentage else "Road"
     
-    # Setup Departure Queues and Gate Resource
-    truck_queue = []
-    train_queue = []
-    gate_resource = simpy.Resource(env, capacity=sim_config["gate"]["number_of_gates"])
+    # Setup Departure Queues (gate lanes block on the truck queue)
+    truck_queue = ContainerQueue(env)
+    train_queue = ContainerQueue(env)
     
     # Create Vessel Objects
     arrival_variability = sim_config["arrival_variability"]
     vessels = []
     for vessel_data in config["vessels"]:
+        # "containers" is either a count (all of the first category) or a dict of counts per category.
+        containers = vessel_data["containers"]
+        container_counts = dict(containers) if isinstance(containers, dict) else {container_categories[0]: containers}
+        unknown = [category for category in container_counts if category not in yards.yards]
+        if unknown:
+            raise ValueError(f"Vessel {vessel_data['name']}: unknown container categories {unknown}")
         vessel_obj = Vessel(
             name=vessel_data["name"],
-            container_count=vessel_data["containers"],
+            container_count=sum(container_counts.values()),
             expected_arrival_day=vessel_data["expected_arrival_day"],
             expected_arrival=vessel_data["expected_arrival"],
-            arrival_variability=arrival_variability
+            arrival_variability=arrival_variability,
+            container_counts=container_counts
         )
         vessel_obj.adjust_arrival()  # Sets vessel.actual_arrival, corresponding to "vessel_arrives"
         vessels.append(vessel_obj)
     
     container_id_counter = total_initial
     
-    def vessel_process(env, vessel, berth_manager, yards, container_id_counter, train_percentage, sim_config, container_categories):
+    def vessel_process(env, vessel, berth_manager, yards, container_id_counter, train_percentage, sim_config):
         # Wait until the vessel actually arrives
         yield env.timeout(vessel.actual_arrival)
         
@@ -85,10 +92,10 @@ def main(progress_callback=None):
         berth = yield berth_manager.request_berth()
         berth_alloc_time = env.now  # This is "vessel_berths"
         
-        # Unload the vessel, adding containers to the yard as they are unloaded
+        # Unload the vessel, adding each container to its category's yard as it is unloaded
         yield env.process(unload_vessel(
             env, vessel, berth, sim_config["unload_params"],
-            yards[container_categories[0]], container_id_counter, train_percentage, sim_config, container_categories
+            yards, container_id_counter, train_percentage, sim_config
         ))
         
         # Release the berth
@@ -98,43 +105,34 @@ def main(progress_callback=None):
         container_id_counter += vessel.container_count
         
         # Record yard utilization
-        total_occ = sum(yard.get_occupancy() for yard in yards.values())
-        metrics.record_yard_utilization(env.now, "all", total_occ)
+        metrics.record_yard_utilization(env.now, "all", yards.occupancy)
     
-    def yard_to_departure(env, yard, truck_queue, train_queue):
+    def yard_to_departure(env, yards, truck_queue, train_queue):
+        # One process for all categories: sleeps until the earliest retrieval_ready time
+        # across the category heaps instead of scanning the yards.
         while True:
-            if yard.containers:
-                next_ready_time = min(c.checkpoints["retrieval_ready"] for c in yard.containers if "retrieval_ready" in c.checkpoints)
-                wait_time = max(0, next_ready_time - env.now)
-                yield env.timeout(wait_time)
-                ready_containers = [c for c in yard.containers if "retrieval_ready" in c.checkpoints and env.now >= c.checkpoints["retrieval_ready"]]
-                for c in ready_containers:
-                    yard.containers.remove(c)
-                    c.checkpoints["waiting_for_inland_tsp"] = env.now
-                    if c.mode == "Rail":
-                        train_queue.append(c)
-                    else:
-                        truck_queue.append(c)
-            else:
-                yield env.timeout(1)
-    
-    def termination_process(env, yards, truck_queue, train_queue, vessel_processes):
+            ready_containers = yield from yards.retrieve_ready_containers()
+            for c in ready_containers:
+                if c.mode == "Rail":
+                    train_queue.append(c)
+                else:
+                    truck_queue.append(c)
+    
+    def vessels_finished(env, vessel_processes):
         yield simpy.events.AllOf(env, vessel_processes)
-        while True:
-            total_yard = sum(yard.get_occupancy() for yard in yards.values())
-            tq = len(truck_queue)
-            trq = len(train_queue)
-            if total_yard == 0 and tq == 0 and trq == 0:
-                raise Termination
-            yield env.timeout(1)
+        metrics.vessels_finished_at = env.now
     
     def progress_tracker(env, yards, truck_queue, train_queue):
-        total_capacity = sum(yard.capacity for yard in yards.values())
+        total_capacity = yards.capacity
+        per_category = len(container_categories) > 1
         while True:
-            total = sum(yard.get_occupancy() for yard in yards.values())
+            total = yards.occupancy
             tq = len(truck_queue)
             trq = len(train_queue)
             metrics.record_yard_utilization(env.now, "all", total)
+            if per_category:
+                for category in container_categories:
+                    metrics.record_yard_utilization(env.now, category, yards.get_occupancy(category))
             metrics.record_truck_queue(env.now, tq)
             metrics.record_train_queue(env.now, trq)
             if progress_callback:
@@ -146,29 +144,38 @@ def main(progress_callback=None):
     for vessel in vessels:
         proc = env.process(vessel_process(
             env, vessel, berth_manager, yards, container_id_counter,
-            train_percentage, sim_config, container_categories
+            train_percentage, sim_config
         ))
         vessel_processes.append(proc)
         container_id_counter += vessel.container_count  # Increment for the next vessel
     
-    # Start yard-to-departure processes for each yard
-    for yard_instance in yards.values():
-        env.process(yard_to_departure(env, yard_instance, truck_queue, train_queue))
+    # Start the shared yard release process
+    env.process(yard_to_departure(env, yards, truck_queue, train_queue))
+    
+    # The run ends the moment the last container (initial or from a vessel) departs.
+    completion = CompletionTracker(env, total_initial + sum(vessel.container_count for vessel in vessels))
     
     # Start departure processes
-    env.process(truck_departure_process(env, truck_queue, gate_resource, sim_config["gate"]["truck_processing_time"], sim_config["gate"]["operating_hours"], metrics))
-    env.process(train_departure_process(env, train_queue, sim_config["trains_per_day"], sim_config["train"]["capacity"], metrics))
+    start_gate_lanes(env, truck_queue, sim_config["gate"], metrics, completion)
+    env.process(train_departure_process(env, train_queue, sim_config["trains_per_day"], sim_config["train"]["capacity"],
+                                        metrics, completion))
     
-    # Start termination and progress tracking
-    env.process(termination_process(env, yards, truck_queue, train_queue, vessel_processes))
+    # Start vessel completion and progress tracking
+    env.process(vessels_finished(env, vessel_processes))
     env.process(progress_tracker(env, yards, truck_queue, train_queue))
     
-    try:
-        env.run()
-    except Termination:
-        pass
+    env.run(until=completion.done)
+    metrics.completion_time = env.now
+    # Tail: from the last vessel finishing its unload to the last departure.
+    metrics.tail_duration = env.now - metrics.vessels_finished_at if metrics.vessels_finished_at is not None else None
+    metrics.record_yard_utilization(env.now, "all", yards.occupancy)
+    metrics.record_truck_queue(env.now, len(truck_queue))
+    metrics.record_train_queue(env.now, len(train_queue))
     
     return metrics
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    metrics = main()
+    print(f"All containers departed at {metrics.completion_time:.2f}h"
+          + (f", {metrics.tail_duration:.2f}h after the last vessel finished unloading."
+             if metrics.tail_duration is not None else "."))
\ No newline at end of file
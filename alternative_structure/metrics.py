@@ -1,71 +1,152 @@
 # metrics.py
 
+import importlib.util
+import numpy as np
+from container import CHECKPOINTS
+
+# Derived durations: (column, start checkpoint, end checkpoint).
+DURATIONS = (
+    ("vessel_delays", "vessel_scheduled_arrival", "vessel_arrives"),
+    ("berth_delays", "vessel_arrives", "vessel_berths"),
+    ("unloading_time", "vessel_arrives", "entered_yard"),
+    ("yard_time", "entered_yard", "retrieval_ready"),
+    ("retrieval_time", "retrieval_ready", "waiting_for_inland_tsp"),
+    ("queuing_for_tsp", "waiting_for_inland_tsp", "loaded_for_transport"),
+    ("loading_time", "loaded_for_transport", "departed_port"),
+    ("total_dwell_time", "vessel_arrives", "departed_port"),
+)
+
+def parquet_available():
+    return any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet"))
+
 class Metrics:
-    def __init__(self):
-        # List of dictionaries; each dictionary represents one container's final record.
-        self.container_records = []
+    def __init__(self, initial_capacity=1024):
+        # Departed containers, one row each, in typed columns that grow by doubling:
+        # a float64 row of checkpoint times (NaN when unset), the id, the initial flag and
+        # the category, mode and vessel as codes into category_names, mode_names and vessel_names.
+        self._times = np.empty((initial_capacity, len(CHECKPOINTS)), dtype=np.float64)
+        self._container_ids = np.empty(initial_capacity, dtype=np.int64)
+        self._is_initial = np.empty(initial_capacity, dtype=bool)
+        self._categories = np.empty(initial_capacity, dtype=np.int32)
+        self._modes = np.empty(initial_capacity, dtype=np.int32)
+        self._vessels = np.empty(initial_capacity, dtype=np.int32)
+        self._size = 0
+        self.category_names = []
+        self.mode_names = []
+        self.vessel_names = []
+        self._category_codes = {}
+        self._mode_codes = {}
+        self._vessel_codes = {}
         # List of tuples: (time, yard_identifier, occupancy)
         self.yard_utilization = []
         # List of tuples: (time, truck_queue_length)
         self.truck_queue_lengths = []
         # List of tuples: (time, train_queue_length)
         self.train_queue_lengths = []
+        # Set by main: when the last vessel finished unloading, when the last container departed
+        # and the tail between the two (hours).
+        self.vessels_finished_at = None
+        self.completion_time = None
+        self.tail_duration = None
+
+    def __len__(self):
+        """Number of departed containers recorded."""
+        return self._size
 
     def record_container_departure(self, container):
         """
-        Record the final state of a container and calculate derived durations.
-        
-        The container object should have the following checkpoints:
-            - vessel: the vessel that delivered the container.
-            - vessel_scheduled_arrival: when the vessel was scheduled to arrive.
-            - vessel_arrives: when the vessel actually arrived.
-            - vessel_berths: when the vessel berths.
-            - entered_yard: when the container enters the yard.
-            - retrieval_ready: when the container is ready for retrieval.
-            - waiting_for_inland_tsp: when retrieval is complete (container waiting for inland transport).
-            - loaded_for_transport: when the container is loaded onto its transport.
-            - departed_port: when the container departs the port.
-        
-        Derived durations:
-            - vessel_delays = vessel_arrives - vessel_scheduled_arrival
-            - berth_delays = vessel_berths - vessel_arrives
-            - unloading_time = entered_yard - vessel_arrives
-            - yard_time = retrieval_ready - entered_yard
-            - retrieval_time = waiting_for_inland_tsp - retrieval_ready
-            - queuing_for_tsp = loaded_for_transport - waiting_for_inland_tsp
-            - loading_time = departed_port - loaded_for_transport
+        Record the final state of a departed container: its id, initial flag, category, mode,
+        vessel and checkpoint times. Durations are derived per column in to_frame.
+        """
+        self._reserve(1)
+        self._write(self._size, container)
+        self._size += 1
+
+    def record_container_departures(self, containers):
+        """
+        Record a batch of departed containers, e.g. one train, in a single append.
+        """
+        self._reserve(len(containers))
+        row = self._size
+        for container in containers:
+            self._write(row, container)
+            row += 1
+        self._size = row
+
+    def _reserve(self, count):
+        capacity = len(self._container_ids)
+        if self._size + count <= capacity:
+            return
+        while capacity < self._size + count:
+            capacity *= 2
+        for name in ("_times", "_container_ids", "_is_initial", "_categories", "_modes", "_vessels"):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def _write(self, row, container):
+        self._times[row] = container.checkpoints
+        self._container_ids[row] = container.container_id
+        self._is_initial[row] = container.is_initial
+        self._categories[row] = self._code(container.category, self._category_codes, self.category_names)
+        self._modes[row] = self._code(container.mode, self._mode_codes, self.mode_names)
+        self._vessels[row] = self._code(container.vessel, self._vessel_codes, self.vessel_names)
+
+    @staticmethod
+    def _code(name, codes, names):
+        if name is None:
+            return -1  # read back as a missing value
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    @property
+    def checkpoint_times(self):
+        """(containers, checkpoints) float64 array of the recorded times, columns in CHECKPOINTS order."""
+        return self._times[:self._size]
+
+    def durations(self):
+        """Dict of derived duration arrays (NaN where a checkpoint is missing), one per DURATIONS entry."""
+        times = self.checkpoint_times
+        index = {name: i for i, name in enumerate(CHECKPOINTS)}
+        return {name: times[:, index[end]] - times[:, index[start]] for name, start, end in DURATIONS}
+
+    def to_frame(self):
+        """
+        DataFrame with one row per departed container: container_id, is_initial, category, mode, vessel,
+        the checkpoint times and the derived durations.
         """
-        cp = container.checkpoints
-
-        def calc_duration(start_key, end_key):
-            if (start_key in cp and end_key in cp and 
-                cp[start_key] is not None and cp[end_key] is not None):
-                return cp[end_key] - cp[start_key]
-            return None
-
-        record = {
-            "container_id": container.container_id,
-            "is_initial": container.is_initial,
-            "mode": container.mode,
-            "vessel": cp.get("vessel", None),
-            "vessel_scheduled_arrival": cp.get("vessel_scheduled_arrival", None),
-            "vessel_arrives": cp.get("vessel_arrives", None),
-            "vessel_berths": cp.get("vessel_berths", None),
-            "entered_yard": cp.get("entered_yard", None),
-            "retrieval_ready": cp.get("retrieval_ready", None),
-            "waiting_for_inland_tsp": cp.get("waiting_for_inland_tsp", None),
-            "loaded_for_transport": cp.get("loaded_for_transport", None),
-            "departed_port": cp.get("departed_port", None),
-            "vessel_delays": calc_duration("vessel_scheduled_arrival", "vessel_arrives"),
-            "berth_delays": calc_duration("vessel_arrives", "vessel_berths"),
-            "unloading_time": calc_duration("vessel_arrives", "entered_yard"),
-            "yard_time": calc_duration("entered_yard", "retrieval_ready"),
-            "retrieval_time": calc_duration("retrieval_ready", "waiting_for_inland_tsp"),
-            "queuing_for_tsp": calc_duration("waiting_for_inland_tsp", "loaded_for_transport"),
-            "loading_time": calc_duration("loaded_for_transport", "departed_port"),
-            "total_dwell_time": calc_duration("vessel_arrives", "departed_port")
+        import pandas as pd
+        size = self._size
+        times = self.checkpoint_times
+        columns = {
+            "container_id": self._container_ids[:size],
+            "is_initial": self._is_initial[:size],
+            "category": pd.Categorical.from_codes(self._categories[:size], self.category_names),
+            "mode": pd.Categorical.from_codes(self._modes[:size], self.mode_names),
+            "vessel": pd.Categorical.from_codes(self._vessels[:size], self.vessel_names),
         }
-        self.container_records.append(record)
+        for i, name in enumerate(CHECKPOINTS):
+            columns[name] = times[:, i]
+        columns.update(self.durations())
+        return pd.DataFrame(columns)
+
+    def to_parquet(self, path):
+        """
+        Write to_frame() to path as Parquet. Without pyarrow or fastparquet, a CSV is written
+        next to it instead. Returns the path written.
+        """
+        df = self.to_frame()
+        if parquet_available():
+            df.to_parquet(path, index=False)
+            return path
+        csv_path = path[:-len(".parquet")] + ".csv" if path.endswith(".parquet") else path + ".csv"
+        print(f"WARNING: no Parquet engine (pyarrow or fastparquet) installed, writing {csv_path} instead")
+        df.to_csv(csv_path, index=False)
+        return csv_path
 
     def record_yard_utilization(self, time, yard_identifier, occupancy):
         """
@@ -20,16 +20,15 @@ if st.sidebar.button("Run Simulation"):
     st.write("Running simulation, please wait...")
     metrics = main(progress_callback=progress_callback)
     st.success("Simulation completed!")
+    if metrics.tail_duration is not None:
+        st.write(f"All containers departed at {metrics.completion_time:.2f}h, "
+                 f"{metrics.tail_duration:.2f}h after the last vessel finished unloading.")
     
     # Create container DataFrame, filter non-initial containers.
-    if metrics.container_records:
-        df_containers = pd.DataFrame(metrics.container_records)
-        # Compute total_dwell_time = departed_port - entered_yard if both exist.
-        if "departed_port" in df_containers.columns and "entered_yard" in df_containers.columns:
-            df_containers["total_dwell_time"] = df_containers.apply(
-                lambda row: row["departed_port"] - row["entered_yard"]
-                if pd.notnull(row["departed_port"]) and pd.notnull(row["entered_yard"])
-                else None, axis=1)
+    if len(metrics):
+        df_containers = metrics.to_frame()
+        # total_dwell_time = departed_port - entered_yard (NaN if either is missing).
+        df_containers["total_dwell_time"] = df_containers["departed_port"] - df_containers["entered_yard"]
         
         # Filter out initial containers.
         df_non_initial = df_containers[df_containers["is_initial"] == False]
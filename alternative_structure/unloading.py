@@ -2,7 +2,8 @@
 
 import random
 import simpy
-from container import Container
+from container import (Container, ENTERED_YARD, RETRIEVAL_READY, VESSEL_ARRIVES, VESSEL_BERTHS,
+                       VESSEL_SCHEDULED_ARRIVAL)
 
 def unload_container(unload_time_params):
     """
@@ -20,42 +21,50 @@ def unload_container(unload_time_params):
         unload_time_params["mode"]
     )
 
-def crane_unload(env, containers_to_unload, unload_time_params, yard, vessel, container_id_start, train_percentage, sim_config, container_categories):
+def crane_unload(env, categories, unload_time_params, yards, vessel, container_id_start, train_percentage, sim_config):
+    """
+    Unload one container per entry of categories, in order, into the yard of that category.
+    """
     container_id = container_id_start
     cs = sim_config["container_storage"]["triangular_distribution"]  # Storage duration parameters
-    for _ in range(containers_to_unload):
+    for category in categories:
         t = random.triangular(unload_time_params["min"], unload_time_params["max"], unload_time_params["mode"])
         yield env.timeout(t)
         # Create and configure the container
-        new_container = Container(container_id=container_id, is_initial=False)
-        new_container.checkpoints["vessel"] = vessel.name
-        new_container.checkpoints["vessel_scheduled_arrival"] = vessel.scheduled_arrival
-        new_container.checkpoints["vessel_arrives"] = vessel.actual_arrival
-        new_container.checkpoints["vessel_berths"] = env.now - t  # When unloading started
-        new_container.checkpoints["entered_yard"] = env.now
+        new_container = Container(container_id=container_id, category=category, is_initial=False)
+        new_container.vessel = vessel.name
+        checkpoints = new_container.checkpoints
+        checkpoints[VESSEL_SCHEDULED_ARRIVAL] = vessel.scheduled_arrival
+        checkpoints[VESSEL_ARRIVES] = vessel.actual_arrival
+        checkpoints[VESSEL_BERTHS] = env.now - t  # When unloading started
+        checkpoints[ENTERED_YARD] = env.now
         # Set retrieval_ready based on storage duration
         storage_duration = random.triangular(cs["min"], cs["max"], cs["mode"])
-        new_container.checkpoints["retrieval_ready"] = env.now + storage_duration
+        checkpoints[RETRIEVAL_READY] = env.now + storage_duration
         # Assign mode
         new_container.mode = "Rail" if random.random() < train_percentage else "Road"
-        # Set category (use the first category for simplicity, adjust if needed)
-        new_container.category = container_categories[0]
-        # Add the container to the yard immediately
-        yard.add_container(new_container)
+        # Add the container to its category's yard immediately
+        yards.add_container(new_container)
         container_id += 1
 
-def unload_vessel(env, vessel, berth, unload_time_params, yard, container_id_start, train_percentage, sim_config, container_categories):
+def unload_vessel(env, vessel, berth, unload_time_params, yards, container_id_start, train_percentage, sim_config):
+    """
+    Unload a vessel with the berth's effective cranes into the YardSystem yards. The vessel's
+    containers, by category in the order of vessel.container_counts, are split into one
+    contiguous share per crane.
+    """
     effective_cranes = berth.effective_cranes
-    total_containers = vessel.container_count
+    categories = [category for category, count in vessel.container_counts.items() for _ in range(count)]
+    total_containers = len(categories)
     base = total_containers // effective_cranes
     remainder = total_containers % effective_cranes
     crane_processes = []
-    current_container_id = container_id_start
+    start = 0
     for i in range(effective_cranes):
         containers_for_crane = base + (1 if i < remainder else 0)
         crane_processes.append(env.process(crane_unload(
-            env, containers_for_crane, unload_time_params, yard, vessel, current_container_id,
-            train_percentage, sim_config, container_categories
+            env, categories[start:start + containers_for_crane], unload_time_params, yards, vessel,
+            container_id_start + start, train_percentage, sim_config
         )))
-        current_container_id += containers_for_crane
+        start += containers_for_crane
     yield simpy.events.AllOf(env, crane_processes)
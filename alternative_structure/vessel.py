@@ -10,15 +10,19 @@ class Vessel:
     Attributes:
         name (str): Name of the vessel.
         container_count (int): Number of containers on the vessel.
+        container_counts (dict): Number of containers per category; defaults to all of them
+            in category "ANY".
         expected_arrival_day (int): Day of scheduled arrival (starting at 1).
         expected_arrival (float): Hour of scheduled arrival (24-hour clock).
         arrival_variability (dict): Triangular distribution parameters with keys 'min', 'mode', 'max' (in hours).
         scheduled_arrival (float): Computed arrival time (in hours since simulation start).
         actual_arrival (float): Adjusted arrival time after applying variability (vessel_arrives).
     """
-    def __init__(self, name, container_count, expected_arrival_day, expected_arrival, arrival_variability):
+    def __init__(self, name, container_count, expected_arrival_day, expected_arrival, arrival_variability,
+                 container_counts=None):
         self.name = name
         self.container_count = container_count
+        self.container_counts = container_counts if container_counts is not None else {"ANY": container_count}
         self.expected_arrival_day = expected_arrival_day
         self.expected_arrival = expected_arrival
         self.arrival_variability = arrival_variability
@@ -1,7 +1,9 @@
 # yard.py
 
+import heapq
+import itertools
 import simpy
-from container import Container
+from container import Container, ENTERED_YARD, RETRIEVAL_READY, WAITING_FOR_INLAND_TSP
 
 class Yard:
     """
@@ -9,23 +11,36 @@ class Yard:
     
     Attributes:
         env (simpy.Environment): The simulation environment.
+        category (str): The container category this yard stores.
         capacity (int): Maximum number of containers the yard can hold.
         retrieval_delay_per_move (float): Delay (in hours) per level movement when retrieving a container.
-        containers (list): List of containers currently in the yard.
+        containers (dict): Containers currently in the yard, in arrival order (used as an ordered set;
+            the values are unused).
+    
+    Containers with a 'retrieval_ready' checkpoint are also kept in a min-heap keyed on that time,
+    so the next release time is read in O(1) and each release pops in O(log N). Containers removed
+    by other means stay in the heap and are skipped when they reach the top (lazy deletion).
     """
-    def __init__(self, env, capacity, retrieval_delay_per_move=0.1, initial_container_count=0):
+    def __init__(self, env, capacity, retrieval_delay_per_move=0.1, initial_container_count=0,
+                 category="ANY", first_container_id=0):
         self.env = env
+        self.category = category
         self.capacity = capacity
         self.retrieval_delay_per_move = retrieval_delay_per_move
-        self.containers = []
+        self.containers = {}
+        self._release_heap = []  # (retrieval_ready, sequence, container)
+        self._sequence = itertools.count()
+        # Event a waiting release process sleeps on, and the time it sleeps until.
+        self._wakeup = None
+        self._wakeup_at = None
         
         # Pre-populate with initial containers.
         for i in range(initial_container_count):
-            container = Container(container_id=i, is_initial=True)
+            container = Container(container_id=first_container_id + i, category=category, is_initial=True)
             # Record yard entry and retrieval ready time for initial containers.
-            container.checkpoints["entered_yard"] = self.env.now
-            container.checkpoints["retrieval_ready"] = self.env.now
-            container.checkpoints["vessel"] = "Initial"
+            container.checkpoints[ENTERED_YARD] = self.env.now
+            container.checkpoints[RETRIEVAL_READY] = self.env.now
+            container.vessel = "Initial"
             self.add_container(container)
     
     def add_container(self, container):
@@ -40,7 +55,20 @@ class Yard:
         """
         if len(self.containers) >= self.capacity:
             raise Exception("Yard is full. Cannot add more containers.")
-        self.containers.append(container)
+        self.containers[container] = None
+        ready = container.checkpoints[RETRIEVAL_READY]
+        if ready == ready:  # not NaN
+            heapq.heappush(self._release_heap, (ready, next(self._sequence), container))
+            # Wake a release process that sleeps past this container's ready time.
+            if self._wakeup is not None and not self._wakeup.triggered and (
+                    self._wakeup_at is None or ready < self._wakeup_at):
+                self._wakeup.succeed()
+    
+    def remove_container(self, container):
+        """
+        Remove a container from the yard. Its heap entry is dropped lazily.
+        """
+        del self.containers[container]
     
     def get_occupancy(self):
         """
@@ -48,41 +76,67 @@ class Yard:
         """
         return len(self.containers)
     
+    def next_ready_time(self):
+        """
+        Return the earliest 'retrieval_ready' time of the containers in the yard, or None.
+        """
+        heap = self._release_heap
+        while heap and heap[0][2] not in self.containers:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+    
+    def pop_ready(self):
+        """
+        Remove and return the containers whose 'retrieval_ready' time has passed, earliest first.
+        """
+        ready_containers = []
+        heap = self._release_heap
+        while heap and heap[0][0] <= self.env.now:
+            container = heapq.heappop(heap)[2]
+            if container in self.containers:
+                del self.containers[container]
+                ready_containers.append(container)
+        return ready_containers
+    
+    def wait_until_ready(self):
+        """
+        Sleep until the next container is ready: exactly until the earliest 'retrieval_ready'
+        time, or until a container is added while the yard holds none that will become ready.
+        A container added with an earlier ready time wakes the sleeper early.
+        
+        Yields:
+            simpy events for the wait.
+        """
+        while True:
+            next_ready_time = self.next_ready_time()
+            if next_ready_time is not None and next_ready_time <= self.env.now:
+                return
+            self._wakeup = self.env.event()
+            self._wakeup_at = next_ready_time
+            if next_ready_time is None:
+                yield self._wakeup
+            else:
+                yield self.env.timeout(next_ready_time - self.env.now) | self._wakeup
+            self._wakeup = self._wakeup_at = None
+    
     def retrieve_ready_containers(self):
         """
         Retrieves all containers that are ready for departure.
         A container is considered ready if the current time is greater than or equal to its
-        'retrieval_ready' checkpoint.
+        'retrieval_ready' checkpoint. Waits for the next ready time if none is ready yet.
         
         Yields:
-            simpy.timeout: A delay corresponding to processing all ready containers.
+            simpy events while waiting for a container to become ready.
         
         Returns:
             List[Container]: A list of containers that are ready for departure, each with its
                             'waiting_for_inland_tsp' checkpoint updated.
         """
-        while True:
-            # Identify all containers ready for retrieval.
-            ready_containers = [c for c in self.containers 
-                                if "retrieval_ready" in c.checkpoints and self.env.now >= c.checkpoints["retrieval_ready"]]
-            if ready_containers:
-                # Remove all ready containers from the record.
-                for container in ready_containers:
-                    self.containers.remove(container)
-                    container.checkpoints["waiting_for_inland_tsp"] = self.env.now
-                return ready_containers
-            else:
-                # If no containers are ready, wait until the next container becomes ready.
-                if self.containers:
-                    next_ready_time = min(
-                        c.checkpoints["retrieval_ready"] 
-                        for c in self.containers if "retrieval_ready" in c.checkpoints
-                    )
-                    wait_time = next_ready_time - self.env.now
-                    if wait_time > 0:
-                        yield self.env.timeout(wait_time)
-                else:
-                    return []
+        yield from self.wait_until_ready()
+        ready_containers = self.pop_ready()
+        for container in ready_containers:
+            container.checkpoints[WAITING_FOR_INLAND_TSP] = self.env.now
+        return ready_containers
 
     
     def retrieve_ready_container(self):
@@ -97,24 +151,137 @@ class Yard:
         Returns:
             Container: The retrieved container, with its 'waiting_for_inland_tsp' checkpoint recorded.
         """
+        yield from self.wait_until_ready()
+        # The earliest ready container is at the top of the heap.
+        self.next_ready_time()
+        container = heapq.heappop(self._release_heap)[2]
+        del self.containers[container]
+        
+        retrieval_delay = self.retrieval_delay_per_move
+        yield self.env.timeout(retrieval_delay)
+        container.checkpoints[WAITING_FOR_INLAND_TSP] = self.env.now
+        return container
+
+
+class YardSystem:
+    """
+    The yards of all container categories, released by one shared scheduler.
+    
+    Each category keeps its own Yard and release heap. The system keeps a second min-heap with
+    the head (earliest 'retrieval_ready' time) of each category's heap, so a single release
+    process sleeps until the earliest head across all categories and only the categories whose
+    head has passed are popped. Entries for a head that has since moved are skipped when they
+    reach the top. Total occupancy is kept as a running count, so reading it does not sum the
+    yards.
+    
+    Containers must be added through the system (not the Yard directly) to keep the heads and
+    the count current.
+    
+    Attributes:
+        env (simpy.Environment): The simulation environment.
+        yards (dict): Yard per category, in configuration order.
+        capacity (int): Total capacity of all yards.
+        occupancy (int): Number of containers in all yards.
+    """
+    def __init__(self, env, yards):
+        self.env = env
+        self.yards = dict(yards)
+        self.capacity = sum(yard.capacity for yard in self.yards.values())
+        self.occupancy = sum(yard.get_occupancy() for yard in self.yards.values())
+        self._heads = []  # (next ready time, sequence, category)
+        self._head_time = {}  # category -> time of its live entry in _heads
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self._wakeup_at = None
+        for category, yard in self.yards.items():
+            self._push_head(category, yard.next_ready_time())
+    
+    def __getitem__(self, category):
+        return self.yards[category]
+    
+    def __iter__(self):
+        return iter(self.yards)
+    
+    def _push_head(self, category, ready):
+        self._head_time[category] = ready
+        if ready is not None:
+            heapq.heappush(self._heads, (ready, next(self._sequence), category))
+    
+    def add_container(self, container):
+        """
+        Add a container to the yard of its category.
+        
+        Raises:
+            KeyError: If there is no yard for the container's category.
+            Exception: If that yard is full.
+        """
+        category = container.category
+        self.yards[category].add_container(container)
+        self.occupancy += 1
+        ready = container.checkpoints[RETRIEVAL_READY]
+        head = self._head_time[category]
+        if ready == ready and (head is None or ready < head):
+            self._push_head(category, ready)
+            if self._wakeup is not None and not self._wakeup.triggered and (
+                    self._wakeup_at is None or ready < self._wakeup_at):
+                self._wakeup.succeed()
+    
+    def get_occupancy(self, category=None):
+        """
+        Return the number of containers in one category's yard, or in all yards.
+        """
+        return self.occupancy if category is None else self.yards[category].get_occupancy()
+    
+    def next_ready_time(self):
+        """
+        Return the earliest 'retrieval_ready' time across all categories, or None.
+        """
+        heads = self._heads
+        while heads and heads[0][0] != self._head_time[heads[0][2]]:
+            heapq.heappop(heads)
+        return heads[0][0] if heads else None
+    
+    def pop_ready(self):
+        """
+        Remove and return the containers of every category whose 'retrieval_ready' time has
+        passed. Categories are visited in order of their earliest ready time.
+        """
+        ready_containers = []
+        now = self.env.now
+        while True:
+            next_ready_time = self.next_ready_time()
+            if next_ready_time is None or next_ready_time > now:
+                break
+            category = heapq.heappop(self._heads)[2]
+            yard = self.yards[category]
+            ready_containers.extend(yard.pop_ready())
+            self._push_head(category, yard.next_ready_time())
+        self.occupancy -= len(ready_containers)
+        return ready_containers
+    
+    def retrieve_ready_containers(self):
+        """
+        Wait until containers of any category are ready, then release them all.
+        
+        Yields:
+            simpy events while waiting for a container to become ready.
+        
+        Returns:
+            List[Container]: The released containers, each with its 'waiting_for_inland_tsp'
+                            checkpoint updated.
+        """
         while True:
-            # Filter containers that are ready for retrieval.
-            ready_containers = [c for c in self.containers 
-                                if "retrieval_ready" in c.checkpoints and self.env.now >= c.checkpoints["retrieval_ready"]]
-            if ready_containers:
-                # Select the container with the earliest retrieval_ready time.
-                container = min(ready_containers, key=lambda c: c.checkpoints["retrieval_ready"])
-                self.containers.remove(container)
-                
-                retrieval_delay = self.retrieval_delay_per_move
-                yield self.env.timeout(retrieval_delay)
-                container.checkpoints["waiting_for_inland_tsp"] = self.env.now
-                return container
+            next_ready_time = self.next_ready_time()
+            if next_ready_time is not None and next_ready_time <= self.env.now:
+                break
+            self._wakeup = self.env.event()
+            self._wakeup_at = next_ready_time
+            if next_ready_time is None:
+                yield self._wakeup
             else:
-                # If no container is ready, wait until the next retrieval_ready time.
-                if self.containers:
-                    next_ready_time = min(c.checkpoints["retrieval_ready"] for c in self.containers if "retrieval_ready" in c.checkpoints)
-                    wait_time = next_ready_time - self.env.now
-                    yield self.env.timeout(wait_time)
-                else:
-                    return None
+                yield self.env.timeout(next_ready_time - self.env.now) | self._wakeup
+            self._wakeup = self._wakeup_at = None
+        ready_containers = self.pop_ready()
+        for container in ready_containers:
+            container.checkpoints[WAITING_FOR_INLAND_TSP] = self.env.now
+        return ready_containers
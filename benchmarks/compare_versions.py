@@ -0,0 +1,252 @@
+# compare_versions.py
+"""
+Cross-version performance and fidelity harness for the 3.0, 4.0, 4.5 and 5_WIP engines.
+
+One scenario description (the 4.5 config shape, which is a superset of the others) is adapted to
+each version's config, then every version is run once per seed, each run in its own Python
+process. The report puts wall time, peak RSS, SimPy events and KPIs side by side and tests
+every version against a reference version:
+  - two-sample Kolmogorov-Smirnov test on the pooled container dwell times;
+  - permutation test on the per-seed means of each KPI.
+
+    python benchmarks/compare_versions.py --seeds 1 2 3 4 5
+    python benchmarks/compare_versions.py --scenario my_scenario.json --output comparison.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from run_benchmarks import REPO_ROOT, peak_rss, scheduled_events, track_environments
+
+VERSIONS = {
+    "3.0": "port_simulator_3.0 (stable)",
+    "4.0": "port_simulator_4.0 (stable)",
+    "4.5": "port_simulator_4.5 (stable)",
+    "5_WIP": "port_simulator_5_WIP",
+}
+
+# What 3.0 and 4.0 hard-code instead of reading from the config.
+FIXED_IN_OLD_VERSIONS = {"cranes_per_vessel": 4, "trains_per_day": 4, "train_capacity": 750}
+
+KPIS = ["containers_departed", "mean_dwell", "p90_dwell", "mean_yard_wait",
+        "rail_share", "mean_yard_occupancy", "max_truck_queue"]
+
+def load_default_scenario():
+    namespace = {}
+    with open(os.path.join(REPO_ROOT, VERSIONS["4.5"], "config.py")) as f:
+        exec(f.read(), namespace)
+    return namespace["default_config"]
+
+def adapt_scenario(scenario, version, seed):
+    """
+    Return (config, warnings): the scenario in the version's config shape, plus a note for every
+    scenario setting the version cannot represent.
+    """
+    config = json.loads(json.dumps(scenario))
+    warnings = []
+    if version in ("3.0", "4.0"):
+        for key, fixed in FIXED_IN_OLD_VERSIONS.items():
+            value = config.pop(key, fixed)
+            if value != fixed:
+                warnings.append(f"{version} ignores {key}={value} (fixed at {fixed})")
+        config.pop("random_seed", None)
+    else:
+        config["random_seed"] = seed
+    return config, warnings
+
+def kpis(df, metrics):
+    vessel_rows = df[df["vessel"] != "Initial"]
+    dwell = (vessel_rows["departed_port"] - vessel_rows["vessel_arrives"]).dropna().to_numpy()
+    yard_wait = (vessel_rows["loaded_for_transport"] - vessel_rows["entered_yard"]).dropna().to_numpy()
+    departed = vessel_rows["departed_port"].notna()
+    return {
+        "containers_departed": int(departed.sum()),
+        "mean_dwell": float(dwell.mean()) if len(dwell) else None,
+        "p90_dwell": float(np.percentile(dwell, 90)) if len(dwell) else None,
+        "mean_yard_wait": float(yard_wait.mean()) if len(yard_wait) else None,
+        "rail_share": float((vessel_rows.loc[departed, "mode"] == "Rail").mean()) if departed.any() else None,
+        "mean_yard_occupancy": float(np.mean([occ for _, occ in metrics["yard_occupancy"]])),
+        "max_truck_queue": int(max(q for _, q in metrics["truck_queue"])),
+    }, dwell
+
+def run_version(version, scenario_path, seed):
+    """Worker side: run one version once (cwd is its folder) and return its record."""
+    sys.path.insert(0, os.getcwd())
+    environments = track_environments()
+    from simulation_processes import run_simulation
+    with open(scenario_path) as f:
+        config, _ = adapt_scenario(json.load(f), version, seed)
+    # 3.0 and 4.0 do not seed themselves.
+    random.seed(seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, metrics, _ = run_simulation(config)
+    wall_time = time.perf_counter() - start
+    values, dwell = kpis(df, metrics)
+    return {
+        "version": version,
+        "seed": seed,
+        "status": "ok",
+        "wall_time_s": wall_time,
+        "peak_rss_bytes": peak_rss(),
+        "events": scheduled_events(environments),
+        "kpis": values,
+        "dwell": dwell.tolist(),
+    }
+
+def spawn_run(version, scenario_path, seed, timeout):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", version, scenario_path, str(seed)]
+    try:
+        proc = subprocess.run(cmd, cwd=os.path.join(REPO_ROOT, VERSIONS[version]),
+                              capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"version": version, "seed": seed, "status": "timeout"}
+    if proc.returncode != 0:
+        return {"version": version, "seed": seed, "status": "error",
+                "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def ks_test(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic and asymptotic p-value; (None, None) if a sample is empty."""
+    if not len(a) or not len(b):
+        return None, None
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side="right") / len(a)
+    cdf_b = np.searchsorted(b, values, side="right") / len(b)
+    d = float(np.max(np.abs(cdf_a - cdf_b)))
+    n = len(a) * len(b) / (len(a) + len(b))
+    lam = (np.sqrt(n) + 0.12 + 0.11 / np.sqrt(n)) * d
+    k = np.arange(1, 101)
+    p = float(np.clip(2 * np.sum((-1) ** (k - 1) * np.exp(-2 * k ** 2 * lam ** 2)), 0, 1))
+    return d, p
+
+def permutation_test(a, b, rounds=10000, seed=0):
+    """Two-sided p-value for a difference in means, by permuting the pooled samples."""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    observed = abs(a.mean() - b.mean())
+    pooled = np.concatenate([a, b])
+    rng = np.random.default_rng(seed)
+    perms = np.array([rng.permutation(pooled) for _ in range(rounds)])
+    diffs = np.abs(perms[:, :len(a)].mean(axis=1) - perms[:, len(a):].mean(axis=1))
+    return float((np.sum(diffs >= observed - 1e-12) + 1) / (rounds + 1))
+
+def summarise(runs, reference, alpha):
+    by_version = {}
+    for run in runs:
+        if run["status"] == "ok":
+            by_version.setdefault(run["version"], []).append(run)
+    ref_runs = by_version.get(reference, [])
+    summary = {}
+    for version, version_runs in by_version.items():
+        entry = {
+            "runs": len(version_runs),
+            "wall_time_s": float(np.mean([r["wall_time_s"] for r in version_runs])),
+            "peak_rss_bytes": int(max(r["peak_rss_bytes"] for r in version_runs)),
+            "events": float(np.mean([r["events"] for r in version_runs])),
+            "kpis": {},
+        }
+        for kpi in KPIS:
+            values = [r["kpis"][kpi] for r in version_runs if r["kpis"][kpi] is not None]
+            stats = {"mean": float(np.mean(values)) if values else None,
+                     "std": float(np.std(values, ddof=1)) if len(values) > 1 else None}
+            ref_values = [r["kpis"][kpi] for r in ref_runs if r["kpis"][kpi] is not None]
+            if version != reference and values and ref_values:
+                stats["p_value"] = permutation_test(values, ref_values)
+            entry["kpis"][kpi] = stats
+        if version != reference and ref_runs:
+            d, p = ks_test(np.concatenate([r["dwell"] for r in version_runs]),
+                           np.concatenate([r["dwell"] for r in ref_runs]))
+            entry["dwell_ks"] = {"statistic": d, "p_value": p}
+            p_values = [entry["dwell_ks"]["p_value"]] + [s["p_value"] for s in entry["kpis"].values()
+                                                         if "p_value" in s]
+            # A test that could not run (no dwell values on one side) does not decide.
+            entry["faithful"] = all(p >= alpha for p in p_values if p is not None)
+        summary[version] = entry
+    return summary
+
+def print_summary(summary, reference):
+    versions = list(summary)
+    print(f"\n{'':<24}" + "".join(f"{v:>20}" for v in versions))
+    rows = [("wall time (s)", lambda e: f"{e['wall_time_s']:.2f}"),
+            ("peak RSS (MiB)", lambda e: f"{e['peak_rss_bytes'] / 2**20:.0f}"),
+            ("events", lambda e: f"{e['events']:.0f}")]
+    for kpi in KPIS:
+        def cell(e, kpi=kpi):
+            stats = e["kpis"][kpi]
+            if stats["mean"] is None:
+                return "-"
+            text = f"{stats['mean']:.2f}"
+            return text + (f" (p={stats['p_value']:.2f})" if "p_value" in stats else "")
+        rows.append((kpi, cell))
+    def ks_cell(e):
+        if "dwell_ks" not in e:
+            return "ref"
+        p = e["dwell_ks"]["p_value"]
+        return "n/a" if p is None else f"{p:.3f}"
+    rows.append(("dwell KS p-value", ks_cell))
+    rows.append(("faithful", lambda e: str(e.get("faithful", "ref"))))
+    for label, cell in rows:
+        print(f"{label:<24}" + "".join(f"{cell(summary[v]):>20}" for v in versions))
+    print(f"(tests against {reference})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare simulator versions on one scenario.")
+    parser.add_argument("--versions", nargs="+", choices=list(VERSIONS), default=list(VERSIONS))
+    parser.add_argument("--reference", choices=list(VERSIONS), default="4.5")
+    parser.add_argument("--scenario", help="scenario JSON in the 4.5 config shape (default: 4.5 default_config)")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1, 2, 3, 4, 5])
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level for 'faithful'")
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds allowed per run")
+    parser.add_argument("--output", default="version_comparison.json", help="results file (JSON)")
+    parser.add_argument("--worker", nargs=3, metavar=("VERSION", "SCENARIO", "SEED"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        version, scenario_path, seed = args.worker
+        print(json.dumps(run_version(version, scenario_path, int(seed))))
+        return 0
+
+    if args.scenario:
+        scenario_path = os.path.abspath(args.scenario)
+        with open(scenario_path) as f:
+            scenario = json.load(f)
+    else:
+        scenario = load_default_scenario()
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(scenario, f)
+        scenario_path = f.name
+
+    for version in args.versions:
+        for warning in adapt_scenario(scenario, version, 0)[1]:
+            print(f"WARNING: {warning}")
+
+    runs = []
+    for version in args.versions:
+        for seed in args.seeds:
+            run = spawn_run(version, scenario_path, seed, args.timeout)
+            runs.append(run)
+            status = f"{run['wall_time_s']:.2f} s" if run["status"] == "ok" else run["status"]
+            print(f"{version:<8} seed {seed:<5} {status}")
+
+    if not args.scenario:
+        os.unlink(scenario_path)
+
+    summary = summarise(runs, args.reference, args.alpha)
+    print_summary(summary, args.reference)
+    with open(args.output, "w") as f:
+        json.dump({"scenario": scenario, "summary": summary,
+                   "runs": [{k: v for k, v in run.items() if k != "dwell"} for run in runs]}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# container_memory.py
+"""
+Bytes per container record of the 4.5 engine, before and after the slotted Container.
+
+"before" is the former layout: a plain class with a per-instance __dict__ holding the vessel
+name, container type and mode as strings. "after" is simulation_models.Container with
+__slots__ and small-int codes. Both are filled like a departed container (all checkpoint times
+set), and the memory allocated for --count records is measured with tracemalloc. Both rows are
+reported with and without the six checkpoint floats, which are the same in both layouts.
+
+    python benchmarks/container_memory.py --count 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+from run_benchmarks import ENGINES, REPO_ROOT
+
+class DictContainer:
+    """The container record as it was before __slots__ and codes."""
+    def __init__(self, vessel_name, vessel_scheduled_arrival, vessel_arrives, mode, container_type):
+        self.vessel = vessel_name
+        self.vessel_scheduled_arrival = vessel_scheduled_arrival
+        self.vessel_arrives = vessel_arrives
+        self.vessel_berths = None
+        self.entered_yard = None
+        self.waiting_for_inland_tsp = None
+        self.loaded_for_transport = None
+        self.departed_port = None
+        self.mode = mode
+        self.container_type = container_type
+
+def build(factory, count, vessel, mode, container_type, distinct_times):
+    base = (8.5, 9.0, 9.1, 9.1, 10.0, 10.2)
+    containers = []
+    for i in range(count):
+        # Without distinct_times every record shares the same float objects.
+        times = tuple(t + i * 1e-6 for t in base) if distinct_times else base
+        container = factory(vessel, 8, times[0], mode, container_type)
+        (container.vessel_berths, container.entered_yard, container.waiting_for_inland_tsp,
+         container.loaded_for_transport, container.departed_port) = times[1:]
+        containers.append(container)
+    return containers
+
+def bytes_per_container(factory, count, vessel, mode, container_type, distinct_times=True):
+    gc.collect()
+    tracemalloc.start()
+    containers = build(factory, count, vessel, mode, container_type, distinct_times)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del containers
+    return size / count
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per container record, dict layout vs slotted.")
+    parser.add_argument("--count", type=int, default=100000, help="container records to build")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, ENGINES["4.5"]))
+    from config_compiler import ROAD
+    from simulation_models import Container
+
+    # Strings are shared between records as they were in the engine (one object per vessel name).
+    print(f"{args.count} containers, B/container{'record only':>17}{'with times':>14}")
+    rows = [("before (__dict__, strings)", DictContainer, ("CMA CGM LEO", "Road", "Standard")),
+            ("after (__slots__, codes)", Container, (3, ROAD, 0))]
+    sizes = []
+    for label, factory, codes in rows:
+        record = bytes_per_container(factory, args.count, *codes, distinct_times=False)
+        total = bytes_per_container(factory, args.count, *codes)
+        sizes.append((record, total))
+        print(f"    {label:<36}{record:>10.0f}{total:>14.0f}")
+    (record_before, total_before), (record_after, total_after) = sizes
+    print(f"    {'saving':<36}{1 - record_after / record_before:>10.0%}{1 - total_after / total_before:>14.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
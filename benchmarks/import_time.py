@@ -0,0 +1,87 @@
+# import_time.py
+"""
+Cold-start import time of an engine module, i.e. what every fresh pool worker pays before it can
+run a simulation.
+
+Each repeat imports the module in a new Python process (cwd is the engine folder) and times the
+import; the median is compared with --target. The heaviest imports of the first repeat are listed
+from `python -X importtime`, and modules that must stay out of a headless start (pandas and plotly
+by default) are checked in sys.modules. The script exits with status 1 when the median is above
+the target or a forbidden module was loaded.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module cli --target 0.2 --repeats 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from run_benchmarks import ENGINES, REPO_ROOT
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}})
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+def time_import(module, cwd, importtime=False):
+    """Import module in a fresh interpreter; returns (seconds, top-level packages loaded, stderr)."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD.format(module=module)]
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"], proc.stderr
+
+def heaviest_imports(importtime_log, count):
+    """(cumulative microseconds, module) of the slowest imports made directly by the imported module."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two more spaces per level; keep the first level.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of an engine module.")
+    parser.add_argument("--engine", choices=list(ENGINES), default="4.5")
+    parser.add_argument("--module", default="simulation_processes", help="module to import")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--target", type=float, default=0.5, help="maximum median import time in seconds")
+    parser.add_argument("--forbid", nargs="*", default=["pandas", "plotly"],
+                        help="packages the import must not load")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list")
+    args = parser.parse_args()
+
+    cwd = os.path.join(REPO_ROOT, ENGINES[args.engine])
+    _, loaded, log = time_import(args.module, cwd, importtime=True)
+    # -X importtime slows the import down, so the timed repeats run without it.
+    times = [time_import(args.module, cwd)[0] for _ in range(args.repeats)]
+    median = statistics.median(times)
+
+    print(f"import {args.module} ({args.engine}): median {median:.3f} s over {args.repeats} runs "
+          f"(min {min(times):.3f}, max {max(times):.3f}), target {args.target:.3f} s")
+    print("Heaviest imports (cumulative):")
+    for micros, name in heaviest_imports(log, args.top):
+        print(f"    {name:<32}{micros / 1e6:>8.3f} s")
+
+    failed = False
+    if median > args.target:
+        print(f"OVER TARGET by {median - args.target:.3f} s")
+        failed = True
+    for package in args.forbid:
+        if package in loaded:
+            print(f"FORBIDDEN import: {package}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
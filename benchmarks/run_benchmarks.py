@@ -0,0 +1,230 @@
+# run_benchmarks.py
+"""
+Scaling benchmarks for the simulation engines.
+
+Each case runs one engine on a generated scenario (container volume multiplier x horizon in days)
+in its own Python process, with the engine's folder as working directory, and records wall time,
+SimPy events per second, peak RSS and containers per second. Results are written as JSON and
+compared against a stored baseline; a case slower or bigger than the baseline by more than the
+tolerance is flagged as a regression and the script exits with status 1.
+
+    python benchmarks/run_benchmarks.py --volumes 1 10 --horizons 1 7
+    python benchmarks/run_benchmarks.py --save-baseline
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# engine name -> folder holding its modules
+ENGINES = {
+    "4.5": "port_simulator_4.5 (stable)",
+    "5_WIP": "port_simulator_5_WIP",
+    "alternative": "alternative_structure",
+}
+
+# The default vessel schedules cover two days; longer horizons repeat them every two days.
+SCHEDULE_DAYS = 2
+
+def repeat_schedule(vessels, horizon_days, day_key, name_key="name"):
+    repeated = []
+    for k in range(math.ceil(horizon_days / SCHEDULE_DAYS)):
+        for vessel in vessels:
+            vessel = copy.deepcopy(vessel)
+            vessel[day_key] += k * SCHEDULE_DAYS
+            if vessel[day_key] > horizon_days:
+                continue
+            if k:
+                vessel[name_key] = f"{vessel[name_key]} #{k + 1}"
+            repeated.append(vessel)
+    return repeated
+
+def scale_default_config(base, volume, horizon_days):
+    """4.5 / 5_WIP config shape: scale vessel loads and yards, repeat vessels over the horizon."""
+    config = copy.deepcopy(base)
+    config["simulation_duration"] = horizon_days * 24
+    for ct in config["container_types"]:
+        ct["yard_capacity"] = int(ct["yard_capacity"] * volume)
+    for vessel in config["vessels"]:
+        vessel["container_counts"] = {ct: n * volume for ct, n in vessel["container_counts"].items()}
+    config["vessels"] = repeat_schedule(config["vessels"], horizon_days, "day")
+    return config
+
+def scale_alternative_config(base, volume, horizon_days):
+    """alternative_structure config shape; it runs until the yard is empty, so the horizon
+    only bounds the vessel schedule."""
+    config = copy.deepcopy(base)
+    for mapping in config["simulation"]["yard"]["yard_mapping"].values():
+        mapping["capacity"] = int(mapping["capacity"] * volume)
+        mapping["initial_containers"] = int(mapping["initial_containers"] * volume)
+    for vessel in config["vessels"]:
+        containers = vessel["containers"]
+        vessel["containers"] = ({category: count * volume for category, count in containers.items()}
+                                if isinstance(containers, dict) else containers * volume)
+    config["vessels"] = repeat_schedule(config["vessels"], horizon_days, "expected_arrival_day")
+    return config
+
+def peak_rss():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def track_environments():
+    """
+    Keep every simpy.Environment created from now on in the returned list, so the number of
+    events each one scheduled can be read afterwards with scheduled_events().
+    """
+    import simpy
+    environments = []
+    original_init = simpy.Environment.__init__
+
+    def tracking_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        environments.append(self)
+    simpy.Environment.__init__ = tracking_init
+    return environments
+
+def scheduled_events(environments):
+    # simpy numbers every scheduled event from Environment._eid.
+    return sum(next(env._eid) for env in environments)
+
+def run_case(engine, volume, horizon_days):
+    """Worker side: run one case in this process (cwd is the engine folder) and return its record."""
+    sys.path.insert(0, os.getcwd())
+    environments = track_environments()
+
+    if engine == "alternative":
+        import commentjson
+        from main import main
+        with open("config_exp.jsonc") as f:
+            config = scale_alternative_config(commentjson.load(f), volume, horizon_days)
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonc", delete=False) as f:
+            json.dump(config, f)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                metrics = main(config_path=f.name)
+            wall_time = time.perf_counter() - start
+        finally:
+            os.unlink(f.name)
+        containers = len(metrics)
+    else:
+        from config import default_config
+        from simulation_processes import run_simulation
+        config = scale_default_config(default_config, volume, horizon_days)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df, _, _ = run_simulation(config)
+        wall_time = time.perf_counter() - start
+        containers = len(df)
+
+    events = scheduled_events(environments)
+    return {
+        "engine": engine,
+        "volume": volume,
+        "horizon_days": horizon_days,
+        "status": "ok",
+        "wall_time_s": wall_time,
+        "events": events,
+        "events_per_s": events / wall_time if wall_time else None,
+        "containers": containers,
+        "containers_per_s": containers / wall_time if wall_time else None,
+        "peak_rss_bytes": peak_rss(),
+    }
+
+def spawn_case(engine, volume, horizon_days, timeout):
+    """Run one case in a fresh interpreter so modules and peak RSS do not leak between cases."""
+    record = {"engine": engine, "volume": volume, "horizon_days": horizon_days}
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", engine, str(volume), str(horizon_days)]
+    try:
+        proc = subprocess.run(cmd, cwd=os.path.join(REPO_ROOT, ENGINES[engine]),
+                              capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {**record, "status": "timeout"}
+    if proc.returncode != 0:
+        return {**record, "status": "error", "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def case_key(record):
+    return (record["engine"], record["volume"], record["horizon_days"])
+
+def compare(results, baseline, tolerance):
+    """Return one message per metric that got worse than baseline * (1 + tolerance)."""
+    reference = {case_key(r): r for r in baseline if r.get("status") == "ok"}
+    regressions = []
+    for record in results:
+        base = reference.get(case_key(record))
+        if base is None:
+            continue
+        if record.get("status") != "ok":
+            regressions.append(f"{case_key(record)}: {record['status']} (baseline ran in {base['wall_time_s']:.2f} s)")
+            continue
+        for metric in ("wall_time_s", "peak_rss_bytes"):
+            if base.get(metric) and record[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{case_key(record)}: {metric} {record[metric]:.4g} vs baseline "
+                                   f"{base[metric]:.4g} (+{record[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the port simulation engines.")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--volumes", nargs="+", type=int, default=[1, 10, 100],
+                        help="container volume multipliers")
+    parser.add_argument("--horizons", nargs="+", type=int, default=[1, 7, 30], help="horizons in days")
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds allowed per case")
+    parser.add_argument("--output", default="benchmark_results.json", help="results file (JSON)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown or memory growth before flagging a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--worker", nargs=3, metavar=("ENGINE", "VOLUME", "DAYS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        engine, volume, days = args.worker
+        print(json.dumps(run_case(engine, int(volume), int(days))))
+        return 0
+
+    results = []
+    for engine in args.engines:
+        for volume in args.volumes:
+            for days in args.horizons:
+                record = spawn_case(engine, volume, days, args.timeout)
+                results.append(record)
+                if record["status"] == "ok":
+                    print(f"{engine:<12} x{volume:<4} {days:>3} d  {record['wall_time_s']:>9.2f} s  "
+                          f"{record['events_per_s']:>10.0f} ev/s  {record['containers_per_s']:>9.0f} cont/s  "
+                          f"{record['peak_rss_bytes'] / 2**20:>8.1f} MiB")
+                else:
+                    print(f"{engine:<12} x{volume:<4} {days:>3} d  {record['status']}")
+
+    with open(args.output, "w") as f:
+        json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f)["results"], args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
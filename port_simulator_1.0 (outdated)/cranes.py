@@ -0,0 +1,99 @@
+# cranes.py
+"""
+Crane dispatching. A fixed set of crane worker processes pulls containers from the lists of
+the ships at berth, one container at a time, instead of every container queuing on a shared
+crane resource as its own process. Memory depends on the number of cranes and berthed ships,
+not on the number of containers on board.
+"""
+from collections import deque
+
+class CraneJob:
+    """The containers of one berthed ship that are still to be unloaded."""
+    __slots__ = ("containers", "cranes", "in_progress", "done")
+
+    def __init__(self, env, containers):
+        self.containers = deque(containers)
+        self.cranes = 0  # cranes assigned to this ship
+        self.in_progress = 0  # containers being unloaded right now
+        self.done = env.event()
+
+class CraneDispatcher:
+    """
+    crane_count crane workers shared by the berths. A ship is entitled to cranes_per_berth
+    cranes. Cranes stay with their ship between containers and are reassigned only when:
+      - their ship has no containers left: they move to the ship with the fewest cranes
+        (the earliest berthed on a tie), or go idle until a ship berths;
+      - their ship has more than cranes_per_berth cranes and another ship has fewer: they
+        move to the earliest berthed such ship after their current container.
+    So a ship alone at berth is worked by every crane, and a ship that berths next to it takes
+    its share back container by container.
+
+    unload_container(container) is the generator a crane runs for one container. Busy cranes
+    are recorded in timeline (a UsageTimeline) when given; reassignments counts crane moves
+    from one ship to another.
+    """
+    def __init__(self, env, crane_count, cranes_per_berth, unload_container, timeline=None):
+        self.env = env
+        self.crane_count = crane_count
+        self.cranes_per_berth = cranes_per_berth
+        self.unload_container = unload_container
+        self.timeline = timeline
+        self.jobs = []  # ships at berth with containers left, in berthing order
+        self.busy = 0
+        self.reassignments = 0
+        self._work = env.event()
+        for _ in range(crane_count):
+            env.process(self._crane())
+
+    def unload(self, containers):
+        """Process: unload containers with the cranes; ends when the last one is unloaded."""
+        job = CraneJob(self.env, containers)
+        if not job.containers:
+            return
+        self.jobs.append(job)
+        # Wake the idle cranes; each one picks a ship in _assign.
+        work, self._work = self._work, self.env.event()
+        work.succeed()
+        yield job.done
+
+    def _assign(self, job):
+        """The job a crane that just finished on job (or was idle, job None) works on next."""
+        if job is not None and job.containers:
+            if job.cranes <= self.cranes_per_berth:
+                return job
+            target = next((j for j in self.jobs if j.cranes < self.cranes_per_berth), job)
+        elif self.jobs:
+            target = min(self.jobs, key=lambda j: j.cranes)
+        else:
+            target = None
+        if target is not job:
+            if job is not None:
+                job.cranes -= 1
+                if target is not None:
+                    self.reassignments += 1
+            if target is not None:
+                target.cranes += 1
+        return target
+
+    def _crane(self):
+        job = None
+        while True:
+            job = self._assign(job)
+            if job is None:
+                yield self._work
+                continue
+            container = job.containers.popleft()
+            if not job.containers:
+                self.jobs.remove(job)
+            job.in_progress += 1
+            self._set_busy(1)
+            yield from self.unload_container(container)
+            self._set_busy(-1)
+            job.in_progress -= 1
+            if not job.containers and not job.in_progress:
+                job.done.succeed()
+
+    def _set_busy(self, delta):
+        self.busy += delta
+        if self.timeline is not None:
+            self.timeline.record(self.env.now, self.busy)
@@ -3,6 +3,10 @@ import random
 import pandas as pd
 
 class Container:
+    __slots__ = ("id", "arrival_time", "is_new", "type", "modal", "yard_entry_time", "ready_time",
+                 "departure_time", "stacking_level", "from_vessel", "departure_wait_start",
+                 "yard_waiting_time", "berth_time", "vessel")
+
     def __init__(self, id, arrival_time, container_types, modal_split):
         self.id = id
         self.arrival_time = arrival_time
@@ -49,6 +53,7 @@ class Container:
 
         self.yard_waiting_time = max(60, yard_waiting_time)  # Minimum waiting time: 1 hour
         self.berth_time = None  # Time when vessel carrying container berthed
+        self.vessel = None  # Ship that delivered the container (None for initial yard containers)
 
 class Ship:
     def __init__(self, env, name, container_count, expected_arrival, actual_arrival, container_types, modal_split):
@@ -67,12 +72,14 @@ class Ship:
     def _generate_containers(self):
         containers = []
         for i in range(self.container_count):
-            containers.append(Container(
+            container = Container(
                 f"{self.id}_container_{i}",
                 self.env.now,
                 self.container_types,
                 self.modal_split
-            ))
+            )
+            container.vessel = self
+            containers.append(container)
         return containers
 
 class ShipSchedule:
@@ -6,6 +6,8 @@ import math  # Ensure math is imported
 import streamlit as st  # Import Streamlit here for progress bar etc.
 from models import Container, Ship
 from stats import Statistics
+from utilization import MonitoredResource
+from cranes import CraneDispatcher
 from datetime import timedelta  # add at top if not already imported
 from rules import calculate_actual_arrival, calculate_stacking_retrieval_time
 
@@ -59,15 +61,27 @@ class PortSimulation:
 
         self.gate_truck_capacity = self.gate_hours.get("trucks_per_hour", 500)
 
-        self.berths = simpy.Resource(self.env, capacity=self.max_berths)
-        self.cranes = simpy.Resource(self.env, capacity=self.max_berths * self.cranes_per_berth)
-        self.gate = simpy.Resource(self.env, capacity=self.gate_hours["gates_capacity"])
+        self.stats = Statistics(self.env, sim_start_time=simulation_start)
 
-        # Yard containers and capacities
+        # Berths, cranes and gate record their busy units on every request and release;
+        # utilisation is derived from those intervals after the run (stats.resource_usage).
+        crane_count = self.max_berths * self.cranes_per_berth
+        self.berths = MonitoredResource(self.env, self.max_berths,
+                                        self.stats.track_usage('berths', self.max_berths * self.effective_berth))
+        # Crane workers pull containers from the berthed ships' lists (see cranes.py).
+        self.cranes = CraneDispatcher(self.env, crane_count, self.cranes_per_berth, self.unload_container,
+                                      self.stats.track_usage('cranes', crane_count * self.effective_crane))
+        self.gate = MonitoredResource(self.env, self.gate_hours["gates_capacity"],
+                                      self.stats.track_usage('gate', self.gate_hours["gates_capacity"]))
+
+        # Yard containers and capacities. Each yard holds a dict used as an ordered set
+        # (values unused), so membership checks and removals are O(1).
         self.yard_containers = {
-            'dry': {'truck': [], 'train': []},
-            'reefer': {'truck': [], 'train': []}
+            'dry': {'truck': {}, 'train': {}},
+            'reefer': {'truck': {}, 'train': {}}
         }
+        # Truck-bound yard containers whose yard time is over, waiting for a gate slot.
+        self.trucks_waiting = 0
         self.regular_yard = {
             'truck': simpy.Container(self.env, capacity=int(25000 * modal_split["truck"])),
             'train': simpy.Container(self.env, capacity=int(25000 * modal_split["train"]))
@@ -76,7 +90,16 @@ class PortSimulation:
             'truck': simpy.Container(self.env, capacity=int(2000 * modal_split["truck"])),
             'train': simpy.Container(self.env, capacity=int(2000 * modal_split["train"]))
         }
+        yard_capacity = sum(yard[modal].capacity for yard in (self.regular_yard, self.reefer_yard) for modal in yard)
+        # Total yard level, recorded by update_yard_state on every level change.
+        self.yard_usage = self.stats.track_usage('yard', yard_capacity * self.effective_yard)
         
+        # Counters kept where containers enter and leave the yard, so progress and the
+        # end-of-run check are O(1) instead of scanning every container after each event.
+        self.yard_container_count = 0
+        self.departed_count = 0
+        self.yard_empty_since = 0  # simulation time the yard last became empty, None while it holds containers
+
         fraction = starting_yard_util_percent / 100.0
         self.initial_containers = []  # track initial yard containers
         # Create initial yard containers – mark these as NOT from a vessel.
@@ -104,14 +127,13 @@ class PortSimulation:
 
         interval = 24 / self.trains_per_day
         self.train_times = [interval * i for i in range(self.trains_per_day)]
-        self.stats = Statistics(self.env, sim_start_time=simulation_start)
         # Flag to control dwell tracking
         self.stats.dwell_tracking_active = True  
         self.ship_arrivals = []
+        self.ship_records = {}  # ship name -> its ship_arrivals record
         self.all_containers = []
 
         self.env.process(self.schedule_trains())
-        self.env.process(self.monitor_utilization())
 
     def schedule_trains(self):
         # Compute departure times for a day based on the number of trains.
@@ -146,45 +168,6 @@ class PortSimulation:
             yield self.env.timeout(wait_minutes)
             self.env.process(self.handle_train_departure())
 
-    def monitor_utilization(self):
-        while True:
-            current_minute = int(self.env.now)  # env.now is in minutes
-            absolute_hour = int(self.env.now / 60)  # Total hours since simulation start
-
-            # Berth utilization: instantaneous usage.
-            berths_in_use = self.berths.count
-            self.stats.resource_usage_by_minute['berths'][current_minute] = (
-                berths_in_use / (self.berths.capacity * self.effective_berth)
-                if self.berths.capacity > 0 else 0
-            )
-
-            # Crane utilization: instantaneous usage.
-            cranes_in_use = self.cranes.count
-            self.stats.resource_usage_by_minute['cranes'][current_minute] = (
-                berths_in_use / (self.berths.capacity * self.effective_berth)
-                if self.berths.capacity > 0 else 0
-            )
-
-            # Gate utilization: computed using absolute hour
-            gate_utilization = self.gate.count / self.gate.capacity if self.gate.capacity > 0 else 0
-            self.stats.resource_usage_by_minute['gate'][current_minute] = gate_utilization
-
-            # Yard utilization: aggregated across truck and train for both regular and reefer yards.
-            reg_truck = self.regular_yard['truck'].level
-            reg_train = self.regular_yard['train'].level
-            ref_truck = self.reefer_yard['truck'].level
-            ref_train = self.reefer_yard['train'].level
-            total_used = reg_truck + reg_train + ref_truck + ref_train
-            total_capacity = (
-                self.regular_yard['truck'].capacity + self.regular_yard['train'].capacity +
-                self.reefer_yard['truck'].capacity + self.reefer_yard['train'].capacity
-            )
-            effective_total_capacity = total_capacity * self.effective_yard
-            yard_frac = total_used / effective_total_capacity if effective_total_capacity > 0 else 0
-            self.stats.resource_usage_by_minute['yard'][current_minute] = yard_frac
-
-            yield self.env.timeout(1)  # record usage every minute
-
     def schedule_ships(self):
         """Schedule all ships based on the provided ship schedule"""
         for ship_data in self.ship_schedule:
@@ -201,13 +184,16 @@ class PortSimulation:
                 self.container_types, 
                 self.modal_split
             )
-            self.ship_arrivals.append({
+            record = {
                 "name": ship_data["name"],
                 "containers": ship_data["containers"],
                 "expected_arrival": expected_arrival,
                 "actual_arrival": actual_arrival,
                 "arrival_delta": actual_arrival - expected_arrival
-            })
+            }
+            self.ship_arrivals.append(record)
+            # Ship names are expected to be unique; the first ship keeps a repeated name.
+            self.ship_records.setdefault(ship_data["name"], record)
             ship_arrival_delay = actual_arrival - expected_arrival
             if ship_arrival_delay > 0 and self.stats.dwell_tracking_active:
                 self.stats.log_dwell_components(ship_arrival_delay=ship_arrival_delay)
@@ -234,34 +220,29 @@ class PortSimulation:
                 self.stats.log_dwell_components(berth_wait_time=berth_wait)
             for c in ship.containers:
                 c.berth_time = ship.berth_entry_time
-            unload_procs = []
-            for c in ship.containers:
-                if self.stats.dwell_tracking_active:
+            if self.stats.dwell_tracking_active:
+                for c in ship.containers:
                     self.stats.log_container_arrival(c.type)
-                unload_procs.append(self.env.process(self.unload_container(c)))
-            yield simpy.events.AllOf(self.env, unload_procs)
+            yield self.env.process(self.cranes.unload(ship.containers))
             yield self.env.timeout(self.berth_transition_time)
             ship.departure_time = self.env.now
         if self.stats.dwell_tracking_active:
             self.stats.log_wait_time('ship', self.env.now - arrival_time)
-        for record in self.ship_arrivals:
-            if record["name"] == ship.name:
-                record["berth_entry_time"] = ship.berth_entry_time
-                record["departure_time"] = ship.departure_time
-                record["berth_wait_time"] = ship.berth_entry_time - ship.actual_arrival
-                record["total_port_time"] = ship.departure_time - ship.actual_arrival
-                break
+        record = self.ship_records.get(ship.name)
+        if record is not None:
+            record["berth_entry_time"] = ship.berth_entry_time
+            record["departure_time"] = ship.departure_time
+            record["berth_wait_time"] = ship.berth_entry_time - ship.actual_arrival
+            record["total_port_time"] = ship.departure_time - ship.actual_arrival
 
     def unload_container(self, container):
-        crane_req_start = self.env.now
-        with self.cranes.request() as crane_req:
-            yield crane_req
-            crane_wait = self.env.now - crane_req_start
-            if self.stats.dwell_tracking_active:
-                self.stats.log_wait_time('crane', crane_wait)
-            unload_time = random.normalvariate(self.unload_time_mean, self.unload_time_std)
-            yield self.env.timeout(max(1, unload_time))
-            self.env.process(self.process_container(container))
+        """Run by a crane for one container: the wait for a crane counts from the ship berthing."""
+        crane_wait = self.env.now - container.berth_time
+        if self.stats.dwell_tracking_active:
+            self.stats.log_wait_time('crane', crane_wait)
+        unload_time = random.normalvariate(self.unload_time_mean, self.unload_time_std)
+        yield self.env.timeout(max(1, unload_time))
+        self.env.process(self.process_container(container))
 
     def process_container(self, container):
         yard = self.reefer_yard if container.type == 'reefer' else self.regular_yard
@@ -272,31 +253,30 @@ class PortSimulation:
             if container.berth_time is not None:
                 container_unloading = container.yard_entry_time - container.berth_time
                 if container.from_vessel and self.stats.dwell_tracking_active:
-                    self.stats.log_dwell_components(container_unloading=container_unloading)
+                    self.stats.log_dwell_components(container_unloading=container_unloading,
+                                                    container_type=container.type, modal=container.modal)
             
             container.stacking_level = self.determine_stacking_level(container.type, container.modal)
             # Calculate and log the stacking retrieval time component
             stacking_time = self.calculate_stacking_retrieval_time(container.stacking_level)
             if container.from_vessel and self.stats.dwell_tracking_active:
-                self.stats.log_stacking_retrieval_time(stacking_time)
+                self.stats.log_stacking_retrieval_time(stacking_time, container.type, container.modal)
 
             if container.from_vessel and self.stats.dwell_tracking_active:
                 self.stats.log_stacking_level(container.stacking_level)
             
-            container_list.append(container)
+            container_list[container] = None
             self.all_containers.append(container)
-            yield yard[container.modal].put(1)
-            self.stats.update_yard_state(
-                self.regular_yard['truck'].level,
-                self.regular_yard['train'].level,
-                self.reefer_yard['truck'].level,
-                self.reefer_yard['train'].level
-            )
+            self.container_entered_yard()
+            put = yard[container.modal].put(1)
+            self.update_yard_state()
+            yield put
 
 
             yard_storage = container.yard_waiting_time
             if container.from_vessel and self.stats.dwell_tracking_active:
-                self.stats.log_dwell_components(yard_storage=yard_storage)
+                self.stats.log_dwell_components(yard_storage=yard_storage,
+                                                container_type=container.type, modal=container.modal)
             
             container.ready_time = self.env.now + container.yard_waiting_time
             
@@ -305,6 +285,7 @@ class PortSimulation:
             
             if container.modal == "truck":
                 if container in container_list:
+                    self.trucks_waiting += 1
                     yield self.env.process(self.handle_truck_departure(container))
             
             if container.from_vessel and self.stats.dwell_tracking_active:
@@ -354,38 +335,32 @@ class PortSimulation:
                 # Log inland transport wait (departure wait) time component
                 if container.from_vessel and self.stats.dwell_tracking_active:
                     departure_wait = container.departure_time - container.departure_wait_start
-                    self.stats.log_dwell_components(departure_wait=departure_wait)
+                    self.stats.log_dwell_components(departure_wait=departure_wait,
+                                                    container_type=container.type, modal=container.modal)
 
 
                 # Remove container from the truck-bound yard.
                 container_list = self.yard_containers[container.type]['truck']
                 if container in container_list:
-                    container_list.remove(container)
+                    del container_list[container]
+                    self.trucks_waiting -= 1
+                    self.container_left_yard()
                 if container.type == 'reefer':
                     yield self.reefer_yard['truck'].get(1)
                 else:
                     yield self.regular_yard['truck'].get(1)
+                self.update_yard_state()
 
                 self.stats.gate_departures_by_hour[absolute_hour] = (
                     self.stats.gate_departures_by_hour.get(absolute_hour, 0) + 1
                 )
 
                 # Log departure details if needed.
-                ship_expected_arrival = None
-                for ship_record in self.ship_arrivals:
-                    if ship_record["name"] == container.id.split("_")[0]:
-                        ship_expected_arrival = ship_record["expected_arrival"]
-                        break
-                if ship_expected_arrival is not None and container.from_vessel and self.stats.dwell_tracking_active:
-                    total_dwell_time = container.departure_time - ship_expected_arrival
-                    self.stats.log_dwell_time(container.type, total_dwell_time)
-
-                truck_waiting = sum(
-                    1 for t in self.yard_containers
-                    for container in self.yard_containers[t]['truck']
-                    if container.departure_wait_start is not None
-                )
-                self.stats.log_truck_waiting(self.env.now, truck_waiting)
+                if container.vessel is not None and container.from_vessel and self.stats.dwell_tracking_active:
+                    total_dwell_time = container.departure_time - container.vessel.expected_arrival
+                    self.stats.log_dwell_time(container.type, total_dwell_time, container.modal)
+
+                self.stats.log_truck_waiting(self.env.now, self.trucks_waiting)
                 break
     
 
@@ -415,7 +390,8 @@ class PortSimulation:
                 container.departure_time = self.env.now
                 loaded_dry += 1
                 capacity_remaining -= 1
-                self.yard_containers['dry']['train'].remove(container)
+                del self.yard_containers['dry']['train'][container]
+                self.container_left_yard()
 
             # Then load reefer containers (sorted by ready time)
             for container in sorted(reefer_train_containers, key=lambda c: c.ready_time):
@@ -424,7 +400,8 @@ class PortSimulation:
                 container.departure_time = self.env.now
                 loaded_reefer += 1
                 capacity_remaining -= 1
-                self.yard_containers['reefer']['train'].remove(container)
+                del self.yard_containers['reefer']['train'][container]
+                self.container_left_yard()
 
             backlog = total_ready - (loaded_dry + loaded_reefer)
             self.stats.log_train_departure(
@@ -481,59 +458,60 @@ class PortSimulation:
 
         return random.choices(valid_levels, weights=valid_probs, k=1)[0]
 
+    def container_entered_yard(self):
+        self.yard_container_count += 1
+        self.yard_empty_since = None
+
+    def container_left_yard(self):
+        """Count a container leaving the yard; every container leaves the yard by departing."""
+        self.yard_container_count -= 1
+        self.departed_count += 1
+        if self.yard_container_count == 0:
+            self.yard_empty_since = self.env.now
+
+    def update_yard_state(self):
+        """Pass the current yard levels to the statistics; called whenever a level changes."""
+        levels = (
+            self.regular_yard['truck'].level,
+            self.regular_yard['train'].level,
+            self.reefer_yard['truck'].level,
+            self.reefer_yard['train'].level
+        )
+        self.stats.update_yard_state(*levels)
+        self.yard_usage.record(self.env.now, sum(levels))
+
     def is_yard_empty(self):
-        total_remaining = 0
-        for container_type in ['dry', 'reefer']:
-            for modal in ['truck', 'train']:
-                total_remaining += len(self.yard_containers[container_type][modal])
-        return total_remaining == 0
+        return self.yard_container_count == 0
     
-    def run(self):
+    def run(self, update_interval=10, empty_yard_grace=60):
         """
-        Run the simulation until the last container has left the port.
+        Run the simulation until the last container has left the port, i.e. until the yard has
+        been empty for empty_yard_grace minutes. The environment runs in batches up to the next
+        progress update (every update_interval simulation minutes) or the end of the grace
+        period, whichever comes first.
         """
         # Schedule ship arrivals as a process.
         self.env.process(self.schedule_ships())
         progress_bar = st.progress(0)
         status_text = st.empty()
 
-        # Track time when the yard first becomes empty.
-        yard_empty_since = None
-
-        # Define an update interval in simulation minutes.
-        update_interval = 10  # e.g., update UI every 10 minutes
-        last_update = self.env.now
-
         while True:
-            self.env.step()
-            self.stats.update_yard_state(
-                self.regular_yard['truck'].level,
-                self.regular_yard['train'].level,
-                self.reefer_yard['truck'].level,
-                self.reefer_yard['train'].level
-            )
-            
+            until = self.env.now + update_interval
+            if self.yard_empty_since is not None:
+                until = min(until, self.yard_empty_since + empty_yard_grace)
+            if until > self.env.now:
+                self.env.run(until=until)
+
+            # Check if the yard has been empty for the whole grace period and exit.
+            if self.yard_empty_since is not None and self.env.now - self.yard_empty_since >= empty_yard_grace:
+                break
+
             # Update progress based on the fraction of containers that have departed.
-            departed_count = sum(1 for container in self.all_containers if container.departure_time is not None)
             if self.total_expected_containers:
-                progress = departed_count / self.total_expected_containers
+                progress = self.departed_count / self.total_expected_containers
             else:
                 progress = 1.0
-
-            # Only update UI if the update interval has been exceeded.
-            if self.env.now - last_update >= update_interval:
-                progress_bar.progress(min(1.0, progress))
-                last_update = self.env.now
-
-            # Check if the yard is empty for an extended period (e.g., 60 minutes) and exit.
-            if self.is_yard_empty():
-                if yard_empty_since is None:
-                    yard_empty_since = self.env.now
-                else:
-                    if self.env.now - yard_empty_since > 60:
-                        break
-            else:
-                yard_empty_since = None
+            progress_bar.progress(min(1.0, progress))
 
         progress_bar.progress(1.0)
         status_text.text(f"Simulation complete at {self.env.now:.1f} minutes")
@@ -1,7 +1,8 @@
 # stats.py
-import numpy as np
 from collections import defaultdict
 from datetime import timedelta
+from quantile_sketch import ALL, SketchSet
+from utilization import UsageTimeline
 
 class Statistics:
     def __init__(self, env, sim_start_time=None):
@@ -25,8 +26,10 @@ class Statistics:
         self.yard_full_events = 0
 
         self.yard_waiting_times = {'dry': [], 'reefer': []}
-        self.dwell_times = {'dry': [], 'reefer': []}
-        self.wait_times = {'ship': [], 'gate': [], 'train': [], 'berth': [], 'crane': []}
+        # Dwell times, wait times and dwell components go into quantile sketches instead of
+        # lists: 'dwell', 'wait.<type>' and 'component.<name>', split by container type and
+        # modal where known. Sketches from several runs can be merged with sketches.merge().
+        self.sketches = SketchSet()
         self.missed_train_connections = 0
 
         self.hourly_stats = {
@@ -47,23 +50,11 @@ class Statistics:
             'yard': defaultdict(float)
         }
 
-        self.resource_usage_by_minute = {
-            'berths': defaultdict(float),
-            'cranes': defaultdict(float),
-            'gate': defaultdict(float),
-            'yard': defaultdict(float)
-        }
+        # Busy units of each tracked resource ('berths', 'cranes', 'gate', 'yard') over time;
+        # see track_usage and resource_usage.
+        self.usage_timelines = {}
         self.train_departure_records = []
 
-        # Dwell time components in minutes
-        self.dwell_components = {
-            'ship_arrival_delay': [],
-            'berth_wait_time': [],
-            'container_unloading': [],
-            'yard_storage': [],
-            'departure_wait': [],
-            'stacking_retrieval': []
-        }
         # Tracking stacking levels
         self.stacking_levels = {level: 0 for level in range(1, 7)}
         
@@ -76,6 +67,26 @@ class Statistics:
 
         self.gate_departures_by_hour = defaultdict(int)
 
+    def track_usage(self, name, capacity):
+        """Create and return the UsageTimeline of a resource; capacity is its effective capacity."""
+        timeline = self.usage_timelines[name] = UsageTimeline(name, capacity, self.env.now)
+        return timeline
+
+    def resource_usage(self, resolution=1, end=None):
+        """
+        DataFrame with a 'minute' column (bin start in simulation minutes) and the exact mean
+        utilisation of every tracked resource over each bin of resolution minutes, up to end
+        (default: now). resolution=60 gives hourly figures, 480 eight-hour shifts.
+        """
+        import pandas as pd
+        end = self.env.now if end is None else end
+        columns = {}
+        for name, timeline in self.usage_timelines.items():
+            starts, usage = timeline.utilization(resolution, end)
+            columns.setdefault("minute", starts)
+            columns[name] = usage
+        return pd.DataFrame(columns)
+
     def log_train_waiting(self, current_time, train_waiting):
         self.train_waiting_over_time.append({
             "time": current_time,  # simulation time in minutes
@@ -125,7 +136,7 @@ class Statistics:
         self.containers[container_type][modal] += 1
 
     def log_wait_time(self, wait_type, wait_time):
-        self.wait_times[wait_type].append(wait_time)
+        self.sketches.add(f'wait.{wait_type}', wait_time)
 
     def log_yard_full(self):
         self.yard_full_events += 1
@@ -152,32 +163,54 @@ class Statistics:
         })
 
     def log_dwell_components(self, ship_arrival_delay=None, berth_wait_time=None,
-                             container_unloading=None, yard_storage=None, departure_wait=None):
+                             container_unloading=None, yard_storage=None, departure_wait=None,
+                             container_type=None, modal=None):
         # Only log if dwell tracking is active.
         if not self.dwell_tracking_active:
             return
-        if ship_arrival_delay is not None:
-            self.dwell_components['ship_arrival_delay'].append(ship_arrival_delay)
-        if berth_wait_time is not None:
-            self.dwell_components['berth_wait_time'].append(berth_wait_time)
-        if container_unloading is not None:
-            self.dwell_components['container_unloading'].append(container_unloading)
-        if yard_storage is not None:
-            self.dwell_components['yard_storage'].append(yard_storage)
-        if departure_wait is not None:
-            self.dwell_components['departure_wait'].append(departure_wait)
+        for name, value in (('ship_arrival_delay', ship_arrival_delay),
+                            ('berth_wait_time', berth_wait_time),
+                            ('container_unloading', container_unloading),
+                            ('yard_storage', yard_storage),
+                            ('departure_wait', departure_wait)):
+            if value is not None:
+                self.sketches.add(f'component.{name}', value, container_type, modal)
 
     def log_stacking_level(self, level):
         if level in self.stacking_levels:
             self.stacking_levels[level] += 1
 
-    def log_stacking_retrieval_time(self, time):
+    def log_stacking_retrieval_time(self, time, container_type=None, modal=None):
         if self.dwell_tracking_active:
-            self.dwell_components['stacking_retrieval'].append(time)
+            self.sketches.add('component.stacking_retrieval', time, container_type, modal)
 
-    def log_dwell_time(self, container_type, time):
+    def log_dwell_time(self, container_type, time, modal=None):
         if self.dwell_tracking_active:
-            self.dwell_times[container_type].append(time)
+            self.sketches.add('dwell', time, container_type, modal)
+
+    def dwell_sketch(self, container_type=ALL, modal=ALL):
+        return self.sketches.get('dwell', container_type, modal)
+
+    def component_sketch(self, name, container_type=ALL, modal=ALL):
+        return self.sketches.get(f'component.{name}', container_type, modal)
+
+    def wait_sketch(self, wait_type):
+        return self.sketches.get(f'wait.{wait_type}')
+
+    def _dwell_days(self, container_type):
+        sketch = self.dwell_sketch(container_type)
+        if not sketch.count:
+            return {'Mean': 0, 'Median': 0, 'Std Dev': 0, '90th Percentile': 0,
+                    '95th Percentile': 0, '99th Percentile': 0}
+        days = 1 / (24 * 60)
+        return {
+            'Mean': sketch.mean * days,
+            'Median': sketch.quantile(0.5) * days,
+            'Std Dev': sketch.std * days,
+            '90th Percentile': sketch.quantile(0.9) * days,
+            '95th Percentile': sketch.quantile(0.95) * days,
+            '99th Percentile': sketch.quantile(0.99) * days
+        }
 
     def get_summary(self):
         total = self.containers['total']
@@ -232,25 +265,12 @@ class Statistics:
                 }
             },
             'Dwell Times (days)': {
-                'Dry': {
-                    'Mean': np.mean(self.dwell_times['dry']) / (24 * 60) if self.dwell_times['dry'] else 0,
-                    'Median': np.median(self.dwell_times['dry']) / (24 * 60) if self.dwell_times['dry'] else 0,
-                    'Std Dev': np.std(self.dwell_times['dry']) / (24 * 60) if self.dwell_times['dry'] else 0,
-                    '95th Percentile': (np.percentile(self.dwell_times['dry'], 95) / (24 * 60) if self.dwell_times['dry'] else 0)
-                },
-                'Reefer': {
-                    'Mean': np.mean(self.dwell_times['reefer']) / (24 * 60) if self.dwell_times['reefer'] else 0,
-                    'Median': np.median(self.dwell_times['reefer']) / (24 * 60) if self.dwell_times['reefer'] else 0,
-                    'Std Dev': np.std(self.dwell_times['reefer']) / (24 * 60) if self.dwell_times['reefer'] else 0,
-                    '95th Percentile': (np.percentile(self.dwell_times['reefer'], 95) / (24 * 60) if self.dwell_times['reefer'] else 0)
-                }
+                'Dry': self._dwell_days('dry'),
+                'Reefer': self._dwell_days('reefer')
             },
             'Wait Times (minutes)': {
-                'Ship': self.wait_times['ship'],
-                'Berth': self.wait_times['berth'],
-                'Crane': self.wait_times['crane'],
-                'Gate': self.wait_times['gate'],
-                'Train': self.wait_times['train']
+                wait_type.capitalize(): self.wait_sketch(wait_type).summary()
+                for wait_type in ('ship', 'berth', 'crane', 'gate', 'train')
             },
             'Operational Issues': {
                 'Yard Full Events': self.yard_full_events,
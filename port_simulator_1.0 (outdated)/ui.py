@@ -7,6 +7,16 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 
+# Dwell components in chart order, with their display names.
+COMPONENT_LABELS = {
+    'ship_arrival_delay': 'Ship Waiting (Schedule Delay)',
+    'berth_wait_time': 'Berth Queue Time',
+    'container_unloading': 'Unloading Process',
+    'yard_storage': 'Yard Storage Time',
+    'stacking_retrieval': 'Stacking Retrieval',
+    'departure_wait': 'Inland Transport Wait'
+}
+
 def render_ship_arrivals(ship_arrivals):
     """
     Render the ship arrivals data as a table.
@@ -23,15 +33,12 @@ def render_dwell_time_boxplot(stats):
     Render a horizontal box plot for dwell times (converted from minutes to days).
     """
     st.markdown("## Dwell Times (Box Plot)")
-    # Convert dwell times from minutes to days
-    dry_dwell_days = [x / (24 * 60) for x in stats.dwell_times['dry']]
-    reefer_dwell_days = [x / (24 * 60) for x in stats.dwell_times['reefer']]
-    
+    # Boxes are drawn from the sketch quartiles (minutes converted to days), not from every value.
     fig = go.Figure()
-    if dry_dwell_days:
-        fig.add_trace(go.Box(x=dry_dwell_days, name='Dry', orientation='h'))
-    if reefer_dwell_days:
-        fig.add_trace(go.Box(x=reefer_dwell_days, name='Reefer', orientation='h'))
+    for container_type, name in (('dry', 'Dry'), ('reefer', 'Reefer')):
+        sketch = stats.dwell_sketch(container_type)
+        if sketch.count:
+            fig.add_trace(go.Box(name=name, orientation='h', y=[name], **sketch.box_stats(1 / (24 * 60))))
     
     fig.update_layout(
         title='Dwell Time Box Plot (Days)',
@@ -44,27 +51,14 @@ def render_resource_heatmap(stats):
     Render a minute-level heatmap for equipment and rail usage.
     
     Expects:
-      - stats.resource_usage_by_minute: a dict with keys 'berths', 'cranes', 'gate', 'yard'.
+      - stats.resource_usage(): mean utilisation of 'berths', 'cranes', 'gate' and 'yard' per minute.
       - stats.train_departure_records: a list of dicts containing train departure records.
     """
 
     st.markdown("## Equipment & Rail Usage Heatmap (Minute-Level)")
 
-    # Define the resource keys for which we have instantaneous values.
-    usage_keys = ['berths', 'cranes', 'gate', 'yard']
-    all_minutes = set()
-    for key in usage_keys:
-        all_minutes |= set(stats.resource_usage_by_minute.get(key, {}).keys())
-    sorted_minutes = sorted(all_minutes)
-
-    # Build a DataFrame for resource usage by minute.
-    usage_data = []
-    for minute in sorted_minutes:
-        entry = {'minute': minute}
-        for key in usage_keys:
-            entry[key] = stats.resource_usage_by_minute.get(key, {}).get(minute, 0)
-        usage_data.append(entry)
-    df_usage = pd.DataFrame(usage_data).sort_values('minute') if usage_data else pd.DataFrame()
+    # Exact mean usage per minute, derived from the busy intervals recorded during the run.
+    df_usage = stats.resource_usage(resolution=1)
 
     # Process rail usage from train departure records.
     rail_df = pd.DataFrame(stats.train_departure_records)
@@ -123,14 +117,10 @@ def plot_dwell_time_waterfall(stats):
     """
     Plot a waterfall chart for the dwell time components.
     """
-    avg_components = {
-        'Ship Waiting (Schedule Delay)': np.mean(stats.dwell_components['ship_arrival_delay']) / 60 if stats.dwell_components['ship_arrival_delay'] else 0,
-        'Berth Queue Time': np.mean(stats.dwell_components['berth_wait_time']) / 60 if stats.dwell_components['berth_wait_time'] else 0,
-        'Unloading Process': np.mean(stats.dwell_components['container_unloading']) / 60 if stats.dwell_components['container_unloading'] else 0,
-        'Yard Storage Time': np.mean(stats.dwell_components['yard_storage']) / 60 if stats.dwell_components['yard_storage'] else 0,
-        'Stacking Retrieval': np.mean(stats.dwell_components['stacking_retrieval']) / 60 if stats.dwell_components['stacking_retrieval'] else 0,
-        'Inland Transport Wait': np.mean(stats.dwell_components['departure_wait']) / 60 if stats.dwell_components['departure_wait'] else 0
-    }
+    avg_components = {}
+    for name, label in COMPONENT_LABELS.items():
+        sketch = stats.component_sketch(name)
+        avg_components[label] = sketch.mean / 60 if sketch.count else 0
     ship_total = avg_components['Ship Waiting (Schedule Delay)'] + avg_components['Berth Queue Time'] + avg_components['Unloading Process']
     yard_total = avg_components['Yard Storage Time'] + avg_components['Stacking Retrieval'] + avg_components['Inland Transport Wait']
     overall_total = ship_total + yard_total
@@ -191,18 +181,11 @@ def plot_dwell_time_boxplot_components(stats):
     Plot a box plot showing the distribution of each dwell time component.
     """
     st.markdown("## Distribution of Dwell Time Components (Box Plot)")
-    component_data = {
-        'Ship Waiting (Schedule Delay)': [x / 60 for x in stats.dwell_components['ship_arrival_delay']] if stats.dwell_components['ship_arrival_delay'] else [],
-        'Berth Queue Time': [x / 60 for x in stats.dwell_components['berth_wait_time']] if stats.dwell_components['berth_wait_time'] else [],
-        'Unloading Process': [x / 60 for x in stats.dwell_components['container_unloading']] if stats.dwell_components['container_unloading'] else [],
-        'Yard Storage Time': [x / 60 for x in stats.dwell_components['yard_storage']] if stats.dwell_components['yard_storage'] else [],
-        'Stacking Retrieval': [x / 60 for x in stats.dwell_components['stacking_retrieval']] if stats.dwell_components['stacking_retrieval'] else [],
-        'Inland Transport Wait': [x / 60 for x in stats.dwell_components['departure_wait']] if stats.dwell_components['departure_wait'] else []
-    }
     fig = go.Figure()
-    for component, data in component_data.items():
-        if data:
-            fig.add_trace(go.Box(y=data, name=component))
+    for name, label in COMPONENT_LABELS.items():
+        sketch = stats.component_sketch(name)
+        if sketch.count:
+            fig.add_trace(go.Box(name=label, x=[label], **sketch.box_stats(1 / 60)))
     fig.update_layout(
         title="Distribution of Dwell Time Components",
         yaxis_title="Hours",
@@ -214,54 +197,25 @@ def plot_dwell_time_boxplot_components(stats):
 def plot_dwell_time_statistics(stats):
     """
     Display a table of detailed dwell time statistics (in hours) for each component,
-    including total dwell time (sum of all components).
+    and for the total dwell time from expected arrival to departure.
     """
     st.markdown("## Detailed Dwell Time Statistics (Hours)")
     stats_table = {}
-    # Process each individual dwell component.
-    for component, values in stats.dwell_components.items():
-        if values:
-            hours_values = [v / 60 for v in values]
-            stats_table[component] = {
-                'Mean': np.mean(hours_values),
-                'Median': np.median(hours_values),
-                'Min': np.min(hours_values),
-                'Max': np.max(hours_values),
-                'Std Dev': np.std(hours_values),
-                'Count': len(hours_values)
-            }
-        else:
-            stats_table[component] = {'Mean': 0, 'Median': 0, 'Min': 0, 'Max': 0, 'Std Dev': 0, 'Count': 0}
-    
-    # Compute total dwell time for each observation by summing all components.
-    # Use zip_longest to handle any potential differences in list lengths (fill missing values with 0).
-    from itertools import zip_longest
-    component_values = list(stats.dwell_components.values())
-    if component_values:
-        total_dwell = [sum(values) for values in zip_longest(*component_values, fillvalue=0)]
-    else:
-        total_dwell = []
-    
-    if total_dwell:
-        total_hours = [v / 60 for v in total_dwell]
-        stats_table['total_dwell'] = {
-            'Mean': np.mean(total_hours),
-            'Median': np.median(total_hours),
-            'Min': np.min(total_hours),
-            'Max': np.max(total_hours),
-            'Std Dev': np.std(total_hours),
-            'Count': len(total_hours)
+    sketches = [(label, stats.component_sketch(name)) for name, label in COMPONENT_LABELS.items()]
+    sketches.append(('Total Dwell Time', stats.dwell_sketch()))
+    for label, sketch in sketches:
+        summary = sketch.summary(1 / 60)
+        stats_table[label] = {
+            'Mean': summary['mean'],
+            'Median': summary['p50'],
+            'P90': summary['p90'],
+            'P99': summary['p99'],
+            'Min': summary['min'],
+            'Max': summary['max'],
+            'Std Dev': summary['std'],
+            'Count': summary['count']
         }
-    else:
-        stats_table['total_dwell'] = {'Mean': 0, 'Median': 0, 'Min': 0, 'Max': 0, 'Std Dev': 0, 'Count': 0}
-    
-    # Create a DataFrame and adjust index names.
     stats_df = pd.DataFrame(stats_table).T
-    stats_df.index = [
-        'Ship Waiting (Schedule Delay)', 'Berth Queue Time', 'Unloading Process', 
-        'Yard Storage Time', 'Stacking Retrieval', 'Inland Transport Wait', 
-        'Total Dwell Time'
-    ]
     st.dataframe(stats_df.style.format("{:.2f}"))
 
 def render_train_departures(train_departure_records):
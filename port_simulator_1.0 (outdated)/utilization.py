@@ -0,0 +1,70 @@
+# utilization.py
+"""
+Resource utilisation from busy intervals. Every change in the number of busy units is recorded
+with its time when it happens (a request granted, a release, a yard level change), so the level
+is a step function of time. Utilisation at any resolution is its exact time-weighted mean over
+each bin, computed after the run instead of sampled by a polling process.
+"""
+import math
+import numpy as np
+import simpy
+
+class UsageTimeline:
+    """
+    Busy units of one resource over time. capacity is the number of units that counts as 100%
+    (already scaled by any availability factor); the level is 0 until the first change.
+    """
+    __slots__ = ("name", "capacity", "times", "levels")
+
+    def __init__(self, name, capacity, start=0.0):
+        self.name = name
+        self.capacity = capacity
+        self.times = [start]
+        self.levels = [0]
+
+    def record(self, time, level):
+        """The level from time on. Repeated levels are not stored."""
+        if level != self.levels[-1]:
+            self.times.append(time)
+            self.levels.append(level)
+
+    def busy_time(self, edges):
+        """Integral of the level (unit-minutes) from the start to each time in edges."""
+        times = np.asarray(self.times, dtype=np.float64)
+        levels = np.asarray(self.levels, dtype=np.float64)
+        cumulative = np.concatenate([[0.0], np.cumsum(levels[:-1] * np.diff(times))])
+        edges = np.asarray(edges, dtype=np.float64)
+        idx = np.maximum(np.searchsorted(times, edges, side="right") - 1, 0)
+        return cumulative[idx] + levels[idx] * np.maximum(edges - times[idx], 0.0)
+
+    def utilization(self, resolution, end):
+        """
+        (bin starts, utilisation) for bins of resolution minutes from 0 to end: the mean level
+        over each bin divided by capacity. The last bin is averaged over its part before end.
+        """
+        bins = max(1, math.ceil(end / resolution))
+        starts = np.arange(bins) * float(resolution)
+        edges = np.append(starts, end)
+        widths = np.diff(edges)
+        busy = np.diff(self.busy_time(edges))
+        if self.capacity <= 0:
+            return starts, np.zeros(bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            usage = np.where(widths > 0, busy / (widths * self.capacity), 0.0)
+        return starts, usage
+
+class MonitoredResource(simpy.Resource):
+    """simpy.Resource that records its number of users in a UsageTimeline on every grant and release."""
+    def __init__(self, env, capacity, timeline):
+        super().__init__(env, capacity=capacity)
+        self.timeline = timeline
+
+    def _do_put(self, event):
+        proceed = super()._do_put(event)
+        self.timeline.record(self._env.now, len(self.users))
+        return proceed
+
+    def _do_get(self, event):
+        proceed = super()._do_get(event)
+        self.timeline.record(self._env.now, len(self.users))
+        return proceed
@@ -0,0 +1,72 @@
+# chart_data.py
+"""
+Chart data for long runs. Time series are cut to the visible time window and reduced with
+Largest-Triangle-Three-Buckets (LTTB) to about as many points as the chart has pixels, so a
+dashboard sends the same amount of data for a 48 h run and a 5000 h one. Peaks and troughs are
+kept because each bucket keeps the point that spans the largest triangle with its neighbours.
+Zooming in means asking again with a narrower window, which returns that part at a higher
+resolution. Only NumPy is needed, except for line_traces, which loads plotly.
+"""
+import numpy as np
+
+# Points per line by default: about the width of a wide dashboard chart in pixels.
+DEFAULT_MAX_POINTS = 1500
+
+def lttb(times, values, max_points):
+    """
+    Indices of at most max_points samples chosen by LTTB. The first and last samples are always
+    kept; the rest are split into max_points - 2 buckets and each bucket keeps one sample.
+    """
+    n = len(times)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(times, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the area of the triangle (selected point, candidate, next bucket's average).
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample(times, values, max_points=DEFAULT_MAX_POINTS, window=None):
+    """
+    (times, values) arrays for a chart. window is an optional (start, end) in hours; the sample
+    just outside each end is kept so the line reaches the edges of the window. times must be sorted.
+    """
+    times = np.asarray(times)
+    values = np.asarray(values)
+    if window is not None:
+        start = max(np.searchsorted(times, window[0], side="left") - 1, 0)
+        end = np.searchsorted(times, window[1], side="right") + 1
+        times, values = times[start:end], values[start:end]
+    keep = lttb(times, values, max_points)
+    return times[keep], values[keep]
+
+def counter_series(counter, dimension):
+    """(label, bin ends, cumulative counts) for each label of one dimension of a BinnedCounter."""
+    labels = dict(counter.dimensions)[dimension]
+    cumulative = counter.cumulative(dimension)
+    return [(label, counter.bin_ends, cumulative[:, i]) for i, label in enumerate(labels)]
+
+def line_traces(series, max_points=DEFAULT_MAX_POINTS, window=None):
+    """
+    One WebGL line (go.Scattergl) per (name, times, values) in series, each downsampled for
+    the window.
+    """
+    import plotly.graph_objects as go
+    traces = []
+    for name, times, values in series:
+        x, y = downsample(times, values, max_points, window)
+        traces.append(go.Scattergl(x=x, y=y, mode="lines", name=name))
+    return traces
@@ -0,0 +1,174 @@
+# cli.py
+"""
+Headless batch runner for the simulation.
+
+    python cli.py scenario_a.jsonc scenario_b.json --replications 5 --workers 4 --out results/
+
+Each config file uses the same schema as config.default_config (JSON, or JSONC when commentjson
+is installed); without files the default config is run. Replication i of a config runs with
+random_seed + i. For every run, the container table, the hourly time series and the binned
+cumulative unload and departure counts are written under <out>/<config name>/rep_<i>/, and all KPIs go to
+<out>/kpi_summary.csv. Config names are the file names without extension and must be unique.
+
+Exit codes: 0 all runs succeeded, 1 at least one run failed, 2 invalid arguments or configs.
+"""
+import argparse
+import contextlib
+import copy
+import importlib.util
+import io
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import commentjson as json
+except ImportError:  # plain JSON only
+    import json
+
+EXIT_OK = 0
+EXIT_RUN_FAILED = 1
+EXIT_BAD_INPUT = 2
+
+def load_config(path):
+    """Read and validate a config file, so a bad one is rejected before any run starts."""
+    from config_compiler import compile_config
+    with open(path) as f:
+        config = json.load(f)
+    try:
+        compile_config(config)
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from exc
+    return config
+
+def series_max(series):
+    return int(series.values.max()) if len(series) else 0
+
+def run_kpis(df, metrics):
+    """Scalar KPIs of one run, over the containers delivered by vessels."""
+    import numpy as np
+    vessel_rows = df[df["vessel"] != "Initial"]
+    dwell = (vessel_rows["departed_port"] - vessel_rows["vessel_arrives"]).dropna()
+    yard_wait = (vessel_rows["loaded_for_transport"] - vessel_rows["entered_yard"]).dropna()
+    return {
+        "containers_departed": len(df),
+        "vessel_containers_departed": len(vessel_rows),
+        "rail_departures": int((df["mode"] == "Rail").sum()),
+        "road_departures": int((df["mode"] == "Road").sum()),
+        "mean_dwell": float(dwell.mean()) if len(dwell) else None,
+        "p90_dwell": float(np.percentile(dwell, 90)) if len(dwell) else None,
+        "mean_yard_wait": float(yard_wait.mean()) if len(yard_wait) else None,
+        "max_yard_occupancy": series_max(metrics["yard_occupancy"]),
+        "max_truck_queue": series_max(metrics["truck_queue"]),
+        "max_rail_queue": series_max(metrics["rail_queue"]),
+    }
+
+def parquet_available():
+    return any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet"))
+
+def write_table(df, path_stem, fmt):
+    if fmt == "parquet":
+        df.to_parquet(path_stem + ".parquet", index=False)
+    else:
+        df.to_csv(path_stem + ".csv", index=False)
+
+def write_outputs(out_dir, df, metrics, fmt):
+    os.makedirs(out_dir, exist_ok=True)
+    write_table(df, os.path.join(out_dir, "containers"), fmt)
+
+    # yard_occupancy, truck_queue, rail_queue, gate_open and occupancy_<type>, sampled hourly.
+    write_table(metrics["registry"].to_frame(), os.path.join(out_dir, "timeseries"), fmt)
+
+    # Cumulative counts at the end of every counter_resolution bin.
+    write_table(metrics["cumulative_unloaded"].to_frame(), os.path.join(out_dir, "unloads"), fmt)
+    write_table(metrics["cumulative_departures"].to_frame(), os.path.join(out_dir, "departures"), fmt)
+
+def run_job(job):
+    """Run one replication; returns its KPI row. Runs inside a pool worker."""
+    from simulation_processes import run_simulation
+    row = {"config": job["name"], "replication": job["replication"], "seed": job["config"].get("random_seed")}
+    try:
+        output = io.StringIO() if not job["verbose"] else sys.stdout
+        with contextlib.redirect_stdout(output):
+            df, metrics, _ = run_simulation(job["config"])
+        write_outputs(job["out_dir"], df, metrics, job["format"])
+        row.update(status="ok", **run_kpis(df, metrics))
+    except Exception:
+        row.update(status="failed", error=traceback.format_exc().strip().splitlines()[-1])
+    return row
+
+def build_jobs(configs, replications, out_root, fmt, verbose):
+    jobs = []
+    for name, config in configs:
+        base_seed = config.get("random_seed")
+        for i in range(replications):
+            job_config = copy.deepcopy(config)
+            if base_seed is not None:
+                job_config["random_seed"] = base_seed + i
+            jobs.append({
+                "name": name,
+                "replication": i,
+                "config": job_config,
+                "out_dir": os.path.join(out_root, name, f"rep_{i}"),
+                "format": fmt,
+                "verbose": verbose,
+            })
+    return jobs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the container terminal simulation headless.")
+    parser.add_argument("configs", nargs="*", help="config files (.json/.jsonc); default: config.default_config")
+    parser.add_argument("--replications", type=int, default=1, help="runs per config (seed = random_seed + i)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--out", default="results", help="output directory")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="table format")
+    parser.add_argument("--verbose", action="store_true", help="show the simulation's own output")
+    args = parser.parse_args(argv)
+
+    if args.replications < 1 or args.workers < 1:
+        print("ERROR: --replications and --workers must be at least 1", file=sys.stderr)
+        return EXIT_BAD_INPUT
+
+    if args.format == "parquet" and not parquet_available():
+        print("WARNING: no Parquet engine (pyarrow or fastparquet) installed, writing CSV instead",
+              file=sys.stderr)
+        args.format = "csv"
+
+    configs = []
+    try:
+        if args.configs:
+            for path in args.configs:
+                name = os.path.splitext(os.path.basename(path))[0]
+                # Outputs go to <out>/<name>/ and rows are keyed by name, so names must be unique.
+                clash = next((other for other, _ in configs if other == name), None)
+                if clash is not None:
+                    raise ValueError(f"{path}: another config is also named '{name}'; rename one of them")
+                configs.append((name, load_config(path)))
+        else:
+            from config import default_config
+            configs.append(("default", default_config))
+    except Exception as exc:  # unreadable file, bad JSON or invalid config
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return EXIT_BAD_INPUT
+
+    jobs = build_jobs(configs, args.replications, args.out, args.format, args.verbose)
+    if args.workers == 1:
+        rows = [run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            rows = list(pool.map(run_job, jobs))
+
+    import pandas as pd
+    os.makedirs(args.out, exist_ok=True)
+    summary = pd.DataFrame(rows)
+    summary.to_csv(os.path.join(args.out, "kpi_summary.csv"), index=False)
+
+    failed = summary[summary["status"] != "ok"]
+    for _, row in failed.iterrows():
+        print(f"FAILED {row['config']} replication {row['replication']}: {row['error']}", file=sys.stderr)
+    print(f"{len(summary) - len(failed)}/{len(summary)} runs succeeded, results in {args.out}")
+    return EXIT_RUN_FAILED if len(failed) else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# config_compiler.py
+"""
+Validates a configuration (config.default_config, or a JSON/JSONC file loaded into the same
+shape) once and compiles it into read-only parameter objects. The processes read attributes and
+call ready-made samplers instead of indexing nested dicts on every event, and a bad config fails
+before the run starts instead of in the middle of it.
+"""
+import random
+from functools import partial
+from types import MappingProxyType
+
+# Transport mode codes stored on containers; MODE_NAMES maps a code back to its label.
+ROAD, RAIL = 0, 1
+MODE_NAMES = ("Road", "Rail")
+
+class ConfigError(ValueError):
+    """Raised with every problem found in a config that cannot be simulated."""
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("Invalid configuration:\n  - " + "\n  - ".join(problems))
+
+class Frozen:
+    """Base for the slotted parameter objects: attributes are set once in __init__."""
+    __slots__ = ()
+
+    def _init(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if not name.startswith("_") and not name.startswith("sample"))
+        return f"{type(self).__name__}({fields})"
+
+class ContainerTypeParams(Frozen):
+    """
+    Parameters of one container type. code is the type's index in SimulationParams.container_types.
+    unload_time and truck_process_time are (low, high, mode) in hours.
+    """
+    __slots__ = ("code", "name", "yard_capacity", "initial_yard_fill", "rail_percentage",
+                 "unload_time", "truck_process_time", "sample_unload_time",
+                 "sample_truck_process_time", "_mode_cum_weights")
+
+    def __init__(self, code, name, yard_capacity, initial_yard_fill, rail_percentage,
+                 unload_time, truck_process_time):
+        self._init(
+            code=code,
+            name=name,
+            yard_capacity=yard_capacity,
+            initial_yard_fill=initial_yard_fill,
+            rail_percentage=rail_percentage,
+            unload_time=unload_time,
+            truck_process_time=truck_process_time,
+            # Samplers draw from the module-level random generator, so random.seed still applies.
+            sample_unload_time=partial(random.triangular, *unload_time),
+            sample_truck_process_time=partial(random.triangular, *truck_process_time),
+            # Same cumulative weights random.choices builds from [rail, 1 - rail].
+            _mode_cum_weights=(rail_percentage, rail_percentage + (1 - rail_percentage)),
+        )
+
+    def sample_modes(self, count):
+        """Draw the transport mode of count containers (RAIL with probability rail_percentage)."""
+        return random.choices((RAIL, ROAD), cum_weights=self._mode_cum_weights, k=count)
+
+class VesselParams(Frozen):
+    """
+    One scheduled vessel. loads pairs each ContainerTypeParams with its container count, in
+    config order; scheduled_arrival is the arrival day and hour converted to simulation hours.
+    """
+    __slots__ = ("name", "day", "hour", "scheduled_arrival", "container_counts", "loads")
+
+    def __init__(self, name, day, hour, loads):
+        self._init(
+            name=name,
+            day=day,
+            hour=hour,
+            scheduled_arrival=(day - 1) * 24 + hour,
+            container_counts=MappingProxyType({ct.name: count for ct, count in loads}),
+            loads=tuple(loads),
+        )
+
+class SimulationParams(Frozen):
+    """The compiled configuration of one run."""
+    __slots__ = ("berth_count", "gate_count", "simulation_duration", "counter_resolution",
+                 "random_seed", "cranes_per_vessel", "trains_per_day", "train_capacity",
+                 "train_interval", "container_types", "types", "vessels")
+
+    def __init__(self, berth_count, gate_count, simulation_duration, counter_resolution, random_seed,
+                 cranes_per_vessel, trains_per_day, train_capacity, container_types, vessels):
+        self._init(
+            berth_count=berth_count,
+            gate_count=gate_count,
+            simulation_duration=simulation_duration,
+            counter_resolution=counter_resolution,  # hours per bin of the unload/departure counters
+            random_seed=random_seed,
+            cranes_per_vessel=cranes_per_vessel,
+            trains_per_day=trains_per_day,
+            train_capacity=train_capacity,
+            train_interval=24.0 / trains_per_day,  # hours between trains
+            container_types=tuple(container_types),
+            types=MappingProxyType({ct.name: ct for ct in container_types}),
+            vessels=tuple(vessels),
+        )
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _check_int(problems, where, value, minimum):
+    if not _is_int(value) or value < minimum:
+        problems.append(f"{where} must be an integer >= {minimum}, got {value!r}")
+        return False
+    return True
+
+def _check_fraction(problems, where, value):
+    if not _is_number(value) or not 0 <= value <= 1:
+        problems.append(f"{where} must be a number between 0 and 1, got {value!r}")
+        return False
+    return True
+
+def _check_triangular(problems, where, value):
+    """
+    A [low, high, mode] list with 0 <= low <= mode <= high. low == high is a constant duration,
+    which the samplers (random.triangular and the vectorised crane_offsets) return as is.
+    """
+    if (not isinstance(value, (list, tuple)) or len(value) != 3
+            or not all(_is_number(v) for v in value)):
+        problems.append(f"{where} must be [low, high, mode], got {value!r}")
+        return False
+    low, high, mode = value
+    if not 0 <= low <= mode <= high:
+        problems.append(f"{where} must satisfy 0 <= low <= mode <= high, got {list(value)}")
+        return False
+    return True
+
+def compile_config(config):
+    """
+    Validate config and return its SimulationParams. Every problem found is reported together
+    in one ConfigError.
+    """
+    problems = []
+    missing = [key for key in ("berth_count", "gate_count", "cranes_per_vessel", "trains_per_day",
+                               "train_capacity", "container_types", "vessels") if key not in config]
+    if missing:
+        raise ConfigError([f"missing key {key!r}" for key in missing])
+
+    for key in ("berth_count", "gate_count", "cranes_per_vessel", "trains_per_day", "train_capacity"):
+        _check_int(problems, key, config[key], 1)
+    simulation_duration = config.get("simulation_duration", 48)
+    _check_int(problems, "simulation_duration", simulation_duration, 1)
+    counter_resolution = config.get("counter_resolution", 0.25)
+    if not _is_number(counter_resolution) or counter_resolution <= 0:
+        problems.append(f"counter_resolution must be a positive number of hours, got {counter_resolution!r}")
+    random_seed = config.get("random_seed")
+    if random_seed is not None and not _is_int(random_seed):
+        problems.append(f"random_seed must be an integer or null, got {random_seed!r}")
+
+    container_types = []
+    for i, ct in enumerate(config["container_types"]):
+        name = ct.get("name")
+        where = f"container type {name or i}"
+        if not isinstance(name, str) or not name:
+            problems.append(f"container type {i} needs a name")
+            continue
+        if name in (t.name for t in container_types):
+            problems.append(f"container type {name!r} is defined twice")
+            continue
+        checks = [
+            _check_int(problems, f"{where}: yard_capacity", ct.get("yard_capacity"), 0),
+            _check_fraction(problems, f"{where}: initial_yard_fill", ct.get("initial_yard_fill", 0)),
+            _check_fraction(problems, f"{where}: rail_percentage", ct.get("rail_percentage")),
+            _check_triangular(problems, f"{where}: unload_time", ct.get("unload_time")),
+            _check_triangular(problems, f"{where}: truck_process_time", ct.get("truck_process_time")),
+        ]
+        if all(checks):
+            container_types.append(ContainerTypeParams(
+                len(container_types), name, ct["yard_capacity"], ct.get("initial_yard_fill", 0),
+                ct["rail_percentage"], tuple(ct["unload_time"]), tuple(ct["truck_process_time"])))
+    if not config["container_types"]:
+        problems.append("at least one container type is required")
+
+    types = {ct.name: ct for ct in container_types}
+    vessels = []
+    for i, v in enumerate(config["vessels"]):
+        where = f"vessel {v.get('name', i)}"
+        checks = [_check_int(problems, f"{where}: day", v.get("day"), 1)]
+        hour = v.get("hour")
+        if not _is_number(hour) or not 0 <= hour < 24:
+            problems.append(f"{where}: hour must be a number in [0, 24), got {hour!r}")
+            checks.append(False)
+        loads = []
+        for type_name, count in v.get("container_counts", {}).items():
+            if type_name not in types:
+                if not any(ct.get("name") == type_name for ct in config["container_types"]):
+                    problems.append(f"{where}: unknown container type {type_name!r}")
+                checks.append(False)
+            elif _check_int(problems, f"{where}: {type_name} count", count, 0):
+                loads.append((types[type_name], count))
+            else:
+                checks.append(False)
+        if all(checks):
+            vessels.append(VesselParams(v.get("name", f"Vessel {i + 1}"), v["day"], hour, loads))
+
+    if problems:
+        raise ConfigError(problems)
+    return SimulationParams(config["berth_count"], config["gate_count"], simulation_duration,
+                            counter_resolution, random_seed, config["cranes_per_vessel"], config["trains_per_day"],
+                            config["train_capacity"], container_types, vessels)
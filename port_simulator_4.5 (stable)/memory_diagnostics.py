@@ -0,0 +1,127 @@
+# memory_diagnostics.py
+import json
+import sys
+import tracemalloc
+import types
+from functools import partial
+import simpy
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None if it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Not charged to a structure: shared code and the environment itself.
+_STOP_TYPES = (simpy.Environment, type, types.ModuleType, types.FunctionType,
+               types.BuiltinFunctionType, partial)
+
+def deep_sizeof(obj, seen=None):
+    """
+    Bytes held by obj and everything it references, counting shared objects once. Bound methods
+    are followed to their object and generators to the locals of their suspended frame, so an
+    event's callbacks (Process._resume) charge the process and its generator. Stops at SimPy
+    environments, modules, classes and functions, and at any object whose id is in seen.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _STOP_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, types.MethodType):
+            stack.append(item.__self__)
+        elif isinstance(item, types.GeneratorType):
+            frame = item.gi_frame
+            if frame is not None:
+                total += sys.getsizeof(frame)
+                stack.extend(frame.f_locals.values())
+        elif isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+        elif hasattr(item, "__slots__"):
+            stack.extend(getattr(item, slot) for slot in item.__slots__ if hasattr(item, slot))
+    return total
+
+class MemoryTracker:
+    """
+    Memory accounting for one run: tracemalloc totals, peak RSS and the deep size of each named
+    structure at every phase boundary passed to snapshot(). Structures are measured independently,
+    so a container referenced by two of them is charged to both.
+    """
+    def __init__(self, top_allocations=5):
+        self.top_allocations = top_allocations
+        self.snapshots = []
+        tracemalloc.start()
+
+    def snapshot(self, phase, structures, container_count, env=None, known_sizes=None):
+        """
+        Record the current memory state. structures maps a label to the object to measure and
+        known_sizes maps a label to a size in bytes measured by the caller (e.g. a DataFrame).
+        container_count is the number of containers in the run, used for bytes per container.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        sizes = {}
+        measured = set()
+        for name, obj in structures.items():
+            seen = set()
+            sizes[name] = deep_sizeof(obj, seen)
+            measured |= seen
+        sizes.update(known_sizes or {})
+        if env is not None:
+            # Each queue entry is (time, priority, id, event); the event's callbacks hold the
+            # processes and their generator frames. Objects already charged to a structure
+            # above (containers, yards) are not charged again.
+            sizes["pending_simpy_events"] = deep_sizeof(env._queue, measured)
+        # Leave out this module: reading __dict__ while measuring materialises it.
+        top = (tracemalloc.take_snapshot()
+               .filter_traces([tracemalloc.Filter(False, __file__)])
+               .statistics("lineno")[:self.top_allocations])
+        self.snapshots.append({
+            "phase": phase,
+            "sim_time": env.now if env is not None else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "peak_rss_bytes": peak_rss(),
+            "containers": container_count,
+            "bytes_per_container": current / container_count if container_count else None,
+            "structures": sizes,
+            "top_allocations": [{"location": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                                for stat in top],
+        })
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def print_report(self):
+        mib = 2 ** 20
+        print("\nMemory diagnostics")
+        for snap in self.snapshots:
+            line = (f"[{snap['phase']}] traced {snap['traced_bytes'] / mib:.1f} MiB "
+                    f"(peak {snap['traced_peak_bytes'] / mib:.1f} MiB)")
+            if snap["peak_rss_bytes"] is not None:
+                line += f", peak RSS {snap['peak_rss_bytes'] / mib:.1f} MiB"
+            line += f", {snap['containers']} containers"
+            if snap["bytes_per_container"] is not None:
+                line += f", {snap['bytes_per_container']:.0f} B/container"
+            print(line)
+            for name, size in sorted(snap["structures"].items(), key=lambda item: item[1], reverse=True):
+                print(f"    {name:<28}{size / mib:>10.2f} MiB")
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshots, f, indent=2)
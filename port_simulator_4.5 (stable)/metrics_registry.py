@@ -0,0 +1,186 @@
+# metrics_registry.py
+"""
+Run metrics stored in typed NumPy arrays. Time series replace lists of (time, value) tuples:
+8 bytes per sample for the float64 time plus the value's dtype (8 for int64, 1 for bool).
+Binned counters replace per-event lists with counts per time bin.
+"""
+import math
+import numpy as np
+
+class TimeSeries:
+    """
+    One metric sampled over simulation time. By default the arrays grow by doubling. With
+    max_samples set, the series is a ring that keeps the last max_samples samples. Every
+    sample is written twice, at i and i + max_samples, so the latest window is always one
+    contiguous slice and times/values stay views.
+    """
+    __slots__ = ("name", "max_samples", "_times", "_values", "_size", "_start")
+
+    def __init__(self, name, dtype=np.int64, max_samples=None, initial_capacity=256):
+        self.name = name
+        self.max_samples = max_samples
+        capacity = 2 * max_samples if max_samples else initial_capacity
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=dtype)
+        self._size = 0
+        self._start = 0
+
+    def append(self, time, value):
+        if self.max_samples:
+            self._append_ring(time, value)
+            return
+        if self._size == len(self._times):
+            self._times = np.concatenate([self._times, np.empty_like(self._times)])
+            self._values = np.concatenate([self._values, np.empty_like(self._values)])
+        self._times[self._size] = time
+        self._values[self._size] = value
+        self._size += 1
+
+    def _append_ring(self, time, value):
+        limit = self.max_samples
+        if self._size < limit:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % limit
+        self._times[slot] = self._times[slot + limit] = time
+        self._values[slot] = self._values[slot + limit] = value
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def times(self):
+        """Sample times in order, as a read-only view of the buffer."""
+        return self._view(self._times)
+
+    @property
+    def values(self):
+        """Sample values in order, as a read-only view of the buffer."""
+        return self._view(self._values)
+
+    def _view(self, array):
+        view = array[self._start:self._start + self._size]
+        view.flags.writeable = False
+        return view
+
+    def __iter__(self):
+        """(time, value) pairs as Python scalars, like the former list of tuples."""
+        return zip(self.times.tolist(), self.values.tolist())
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffers, including unused capacity."""
+        return self._times.nbytes + self._values.nbytes
+
+    def to_series(self):
+        """pandas Series of the values indexed by time, built on the views without copying."""
+        import pandas as pd
+        return pd.Series(self.values, index=pd.Index(self.times, name="time", copy=False),
+                         name=self.name, copy=False)
+
+class MetricsRegistry:
+    """
+    Creates and holds the TimeSeries of a run by name. max_samples, when set, turns every series
+    into a ring buffer of that length, so a live dashboard's memory stays bounded.
+    """
+    def __init__(self, max_samples=None):
+        self.max_samples = max_samples
+        self._series = {}
+
+    def series(self, name, dtype=np.int64):
+        """The series called name, created with dtype on first use."""
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = TimeSeries(name, dtype, self.max_samples)
+        return series
+
+    def __getitem__(self, name):
+        return self._series[name]
+
+    def __contains__(self, name):
+        return name in self._series
+
+    def __iter__(self):
+        return iter(self._series.values())
+
+    @property
+    def nbytes(self):
+        return sum(series.nbytes for series in self._series.values())
+
+    def to_frame(self, names=None):
+        """DataFrame with a time column and one column per series; series must share their times."""
+        import pandas as pd
+        selected = [self._series[name] for name in names] if names else list(self._series.values())
+        if not selected:
+            return pd.DataFrame({"time": []})
+        columns = {"time": selected[0].times}
+        for series in selected:
+            if len(series) != len(selected[0]):
+                raise ValueError(f"Series {series.name} has {len(series)} samples, "
+                                 f"{selected[0].name} has {len(selected[0])}")
+            columns[series.name] = series.values
+        return pd.DataFrame(columns, copy=False)
+
+class BinnedCounter:
+    """
+    Event counts per time bin of width resolution (hours) over [0, horizon], split by one or more
+    coded dimensions. dimensions is a list of (name, labels) pairs; an event is counted with
+    add(time, *codes), one code per dimension. Events after the horizon are not counted, so
+    arrivals scheduled ahead of the clock do not show up in a run that ends before them.
+    Memory and chart preparation depend on the number of bins, not on the number of events.
+    """
+    def __init__(self, horizon, resolution, dimensions):
+        self.horizon = horizon
+        self.resolution = resolution
+        self.dimensions = list(dimensions)
+        self._last_bin = max(1, math.ceil(horizon / resolution)) - 1
+        self.counts = np.zeros((self._last_bin + 1,) + tuple(len(labels) for _, labels in self.dimensions),
+                               dtype=np.int64)
+
+    def add(self, time, *codes, count=1):
+        if time <= self.horizon:
+            self.counts[(min(int(time / self.resolution), self._last_bin),) + codes] += count
+
+    def add_many(self, times, *codes):
+        """Count a batch of events; times and each entry of codes are equal-length arrays."""
+        times = np.asarray(times)
+        keep = times <= self.horizon
+        bins = np.minimum((times[keep] / self.resolution).astype(np.int64), self._last_bin)
+        np.add.at(self.counts, (bins,) + tuple(np.asarray(c)[keep] for c in codes), 1)
+
+    @property
+    def bin_ends(self):
+        """Time at the end of each bin; the last bin ends at the horizon."""
+        return np.minimum(np.arange(1, len(self.counts) + 1) * self.resolution, self.horizon)
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    def cumulative(self, *dimensions):
+        """
+        Cumulative counts at each bin end, summed over the dimensions not named. The shape is
+        (bins, sizes of the named dimensions in declaration order).
+        """
+        axes = tuple(1 + i for i, (name, _) in enumerate(self.dimensions) if name not in dimensions)
+        return np.cumsum(self.counts.sum(axis=axes) if axes else self.counts, axis=0)
+
+    def to_frame(self, *dimensions):
+        """
+        Long DataFrame with a time column, one label column per named dimension (default: all)
+        and the cumulative count, with one row per bin and label combination.
+        """
+        import pandas as pd
+        named = [(name, labels) for name, labels in self.dimensions
+                 if not dimensions or name in dimensions]
+        cumulative = self.cumulative(*(name for name, _ in named))
+        bins = len(cumulative)
+        cells = int(np.prod(cumulative.shape[1:]))
+        grid = np.meshgrid(*(np.arange(len(labels)) for _, labels in named), indexing="ij")
+        frame = {"time": np.repeat(self.bin_ends, cells)}
+        for (name, labels), codes in zip(named, grid):
+            frame[name] = np.tile(np.asarray(labels, dtype=object)[codes.ravel()], bins)
+        frame["cumulative"] = cumulative.reshape(bins, cells).ravel()
+        return pd.DataFrame(frame)
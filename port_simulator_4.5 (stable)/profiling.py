@@ -0,0 +1,127 @@
+# profiling.py
+import json
+import time
+import simpy
+
+class ProcessStats:
+    """
+    Wall time spent inside one kind of process generator, for one container type.
+    """
+    __slots__ = ("processes", "finished", "resumptions", "wall_time")
+
+    def __init__(self):
+        self.processes = 0
+        self.finished = 0
+        self.resumptions = 0
+        self.wall_time = 0.0  # seconds
+
+    @property
+    def events(self):
+        """Events the processes yielded, i.e. scheduled and waited on."""
+        return self.resumptions - self.finished
+
+class ProfiledProcess(simpy.Process):
+    """
+    Process whose every resumption is timed into its ProcessStats. The timing covers the
+    generator step and the scheduling of the event it yields.
+    """
+    def __init__(self, env, generator, stats):
+        self._stats = stats
+        super().__init__(env, generator)
+
+    def _resume(self, event, _clock=time.perf_counter, _resume=simpy.Process._resume,
+                _pending=simpy.events.PENDING):
+        start = _clock()
+        _resume(self, event)
+        stats = self._stats
+        stats.wall_time += _clock() - start
+        stats.resumptions += 1
+        if self._value is not _pending:
+            stats.finished += 1
+
+class ProfiledEnvironment(simpy.Environment):
+    """
+    SimPy environment that times every process resumption and counts the events each process
+    yields, keyed by (generator function name, container type). Only used when profiling is
+    switched on, so a normal run pays nothing for it.
+    """
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.process_stats = {}
+        self.run_time = 0.0
+
+    def process(self, generator):
+        key = (generator.__name__, self._container_type(generator))
+        stats = self.process_stats.get(key)
+        if stats is None:
+            stats = self.process_stats[key] = ProcessStats()
+        stats.processes += 1
+        return ProfiledProcess(self, generator, stats)
+
+    @staticmethod
+    def _container_type(generator):
+        # Arguments are already bound in the frame of a generator that has not started yet.
+        args = generator.gi_frame.f_locals if generator.gi_frame is not None else {}
+        # Yards carry the type name; containers only carry its code.
+        for name in ("yard", "container"):
+            container_type = getattr(args.get(name), "container_type", None)
+            if container_type is not None:
+                return container_type
+        return "-"
+
+    def run(self, until=None):
+        start = time.perf_counter()
+        try:
+            return super().run(until)
+        finally:
+            self.run_time += time.perf_counter() - start
+
+    def report_rows(self):
+        """One dict per (process kind, container type), ranked by wall time, plus SimPy internals."""
+        rows = [{
+            "process": kind,
+            "container_type": container_type,
+            "processes": stats.processes,
+            "resumptions": stats.resumptions,
+            "events": stats.events,
+            "wall_time_s": stats.wall_time,
+            "us_per_resumption": 1e6 * stats.wall_time / stats.resumptions if stats.resumptions else 0.0,
+        } for (kind, container_type), stats in self.process_stats.items()]
+        process_time = sum(row["wall_time_s"] for row in rows)
+        rows.append({
+            "process": "simpy internals",
+            "container_type": "-",
+            "processes": 0,
+            "resumptions": 0,
+            "events": 0,
+            "wall_time_s": max(0.0, self.run_time - process_time),
+            "us_per_resumption": 0.0,
+        })
+        rows.sort(key=lambda row: row["wall_time_s"], reverse=True)
+        return rows
+
+    def print_report(self):
+        rows = self.report_rows()
+        print(f"\nProcess profile ({self.run_time:.2f} s in env.run)")
+        print(f"{'process':<28}{'type':<12}{'procs':>9}{'resumes':>11}{'events':>11}"
+              f"{'wall s':>9}{'share':>8}{'us/res':>9}")
+        for row in rows:
+            share = row["wall_time_s"] / self.run_time if self.run_time else 0.0
+            print(f"{row['process']:<28}{row['container_type']:<12}{row['processes']:>9}"
+                  f"{row['resumptions']:>11}{row['events']:>11}{row['wall_time_s']:>9.3f}"
+                  f"{share:>8.1%}{row['us_per_resumption']:>9.2f}")
+
+    def write_report(self, path):
+        """
+        Write the profile to path: JSON for a .json file, otherwise collapsed stacks
+        ("run;process;type microseconds" per line) for flamegraph.pl or speedscope.
+        """
+        rows = self.report_rows()
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump({"run_time_s": self.run_time, "processes": rows}, f, indent=2)
+            else:
+                for row in rows:
+                    stack = ";".join(["run_simulation", row["process"].replace(" ", "_"),
+                                      str(row["container_type"]).replace(" ", "_")])
+                    f.write(f"{stack} {round(row['wall_time_s'] * 1e6)}\n")
@@ -0,0 +1,260 @@
+# quantile_sketch.py
+"""
+Mergeable streaming quantile sketches (t-digest) for dwell and wait times. A sketch is updated
+one value at a time, answers quantiles at any moment and holds a bounded number of centroids
+whatever the number of values, so replications and worker processes can each keep their own
+and merge them afterwards.
+"""
+import math
+from collections import defaultdict
+from functools import partial
+import numpy as np
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl) with the k1 scale function: centroids are small near the
+    tails and large around the median, so p99 stays accurate. About compression / 2 centroids
+    are kept, plus a buffer of up to 5 * compression recent values that add() only appends to.
+    count, sum, min and max are exact.
+    """
+    __slots__ = ("compression", "_means", "_weights", "_buffer", "_buffer_limit",
+                 "_count", "_total", "_total_sq", "_min", "_max")
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self._means = []
+        self._weights = []
+        self._buffer = []
+        self._buffer_limit = 5 * compression
+        self._count = 0
+        self._total = 0.0
+        self._total_sq = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def add(self, value):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    @property
+    def count(self):
+        return self._count + len(self._buffer)
+
+    @property
+    def total(self):
+        self._compress()
+        return self._total
+
+    @property
+    def min(self):
+        self._compress()
+        return self._min
+
+    @property
+    def max(self):
+        self._compress()
+        return self._max
+
+    def merge(self, other):
+        """Fold other's values into this sketch; other is left unchanged."""
+        if not other.count:
+            return self
+        other._compress()
+        self._compress()
+        self._means.extend(other._means)
+        self._weights.extend(other._weights)
+        self._count += other._count
+        self._total += other._total
+        self._total_sq += other._total_sq
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        self._compress(force=True)
+        return self
+
+    def _compress(self, force=False):
+        """
+        Fold the buffer into the centroids. Points are sorted and grouped by the integer part of
+        k1(q) at their middle, so each centroid covers at most about one unit of k, which is a
+        small quantile range near the tails and a wide one around the median.
+        """
+        if not self._buffer and not force:
+            return
+        buffer = np.asarray(self._buffer, dtype=np.float64)
+        self._buffer = []
+        if len(buffer):
+            self._count += len(buffer)
+            self._total += float(buffer.sum())
+            self._total_sq += float(np.dot(buffer, buffer))
+            self._min = min(self._min, float(buffer.min()))
+            self._max = max(self._max, float(buffer.max()))
+        means = np.concatenate([np.asarray(self._means, dtype=np.float64), buffer])
+        weights = np.concatenate([np.asarray(self._weights, dtype=np.float64), np.ones(len(buffer))])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self._means = (np.add.reduceat(means * weights, starts) / merged_weights).tolist()
+        self._weights = merged_weights.tolist()
+
+    @property
+    def mean(self):
+        if not self.count:
+            return None
+        self._compress()
+        return self._total / self._count
+
+    @property
+    def std(self):
+        """Population standard deviation, like np.std."""
+        if not self.count:
+            return None
+        mean = self.mean
+        return math.sqrt(max(0.0, self._total_sq / self._count - mean * mean))
+
+    def quantile(self, q):
+        """Estimated q-quantile (0 <= q <= 1), or None while the sketch is empty."""
+        if not self.count:
+            return None
+        self._compress()
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        means, weights = self._means, self._weights
+        if len(means) == 1:
+            return means[0]
+        target = q * self._count
+        # Each centroid's mean sits at the middle of its weight; min and max anchor the ends.
+        if target < weights[0] / 2:
+            return self._min + (means[0] - self._min) * target / (weights[0] / 2)
+        if target > self._count - weights[-1] / 2:
+            tail = self._count - target
+            return self._max - (self._max - means[-1]) * tail / (weights[-1] / 2)
+        position = weights[0] / 2
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2
+            if position + step >= target:
+                return means[i] + (means[i + 1] - means[i]) * (target - position) / step
+            position += step
+        return means[-1]
+
+    def quantiles(self, qs=(0.5, 0.9, 0.99)):
+        return [self.quantile(q) for q in qs]
+
+    def summary(self, scale=1.0):
+        """Count, mean, std, min, max, p50, p90 and p99, with values multiplied by scale."""
+        if not self.count:
+            return {"count": 0, "mean": 0, "std": 0, "min": 0, "max": 0, "p50": 0, "p90": 0, "p99": 0}
+        p50, p90, p99 = self.quantiles()
+        return {"count": self.count, "mean": self.mean * scale, "std": self.std * scale,
+                "min": self.min * scale, "max": self.max * scale,
+                "p50": p50 * scale, "p90": p90 * scale, "p99": p99 * scale}
+
+    def box_stats(self, scale=1.0):
+        """
+        Keyword arguments for a pre-aggregated plotly go.Box: quartiles, median, mean and
+        whiskers at the furthest value within 1.5 IQR, in lists of one element, or None while
+        the sketch is empty. Values are read from the centroids, which are single values in the
+        tails.
+        """
+        if not self.count:
+            return None
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = [m for m in [self._min] + self._means + [self._max] if low <= m <= high]
+        return {"q1": [q1 * scale], "median": [self.quantile(0.5) * scale], "q3": [q3 * scale],
+                "mean": [self.mean * scale],
+                "lowerfence": [min(inside, default=q1) * scale],
+                "upperfence": [max(inside, default=q3) * scale]}
+
+    def outliers(self, lower, upper, limit=50, scale=1.0):
+        """
+        Up to limit values outside [lower, upper] (both already scaled), from the centroids and
+        the exact min and max. When there are more, an evenly spaced subset that keeps the most
+        extreme values on each side is returned.
+        """
+        self._compress()
+        values = sorted({m * scale for m in [self._min] + self._means + [self._max]})
+        below = [v for v in values if v < lower]
+        above = [v for v in values if v > upper]
+        if len(below) + len(above) <= limit:
+            return below + above
+        keep_below = round(limit * len(below) / (len(below) + len(above)))
+        return _spaced(below, keep_below) + _spaced(above[::-1], limit - keep_below)[::-1]
+
+    def to_dict(self):
+        self._compress()
+        return {"compression": self.compression, "means": self._means, "weights": self._weights,
+                "count": self._count, "total": self._total, "total_sq": self._total_sq,
+                "min": self._min, "max": self._max}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data["compression"])
+        digest._means = list(data["means"])
+        digest._weights = list(data["weights"])
+        for key in ("count", "total", "total_sq", "min", "max"):
+            setattr(digest, "_" + key, data[key])
+        return digest
+
+
+def _spaced(values, count):
+    """count values evenly spaced through values, keeping the first one (and the last if count > 1)."""
+    if count >= len(values):
+        return values
+    if count <= 1:
+        return values[:count]
+    step = (len(values) - 1) / (count - 1)
+    return [values[round(i * step)] for i in range(count)]
+
+ALL = "all"
+
+class SketchSet:
+    """
+    One TDigest per (metric, container type, mode). add() updates the metric's overall sketch
+    and, when given, its per-type and per-mode sketches; get() reads any of them, using ALL for
+    a dimension that is not split. Two sets merge sketch by sketch.
+    """
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.sketches = defaultdict(partial(TDigest, compression))
+
+    def add(self, metric, value, container_type=None, mode=None):
+        sketches = self.sketches
+        sketches[metric, ALL, ALL].add(value)
+        if container_type is not None:
+            sketches[metric, container_type, ALL].add(value)
+        if mode is not None:
+            sketches[metric, ALL, mode].add(value)
+
+    def get(self, metric, container_type=ALL, mode=ALL):
+        """The sketch for the key; an empty sketch if nothing was recorded under it."""
+        return self.sketches.get((metric, container_type, mode)) or TDigest(self.compression)
+
+    def keys(self, metric=None):
+        return [key for key in self.sketches if metric is None or key[0] == metric]
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            self.sketches[key].merge(sketch)
+        return self
+
+    def to_dict(self):
+        return {"|".join(key): sketch.to_dict() for key, sketch in self.sketches.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        # Every sketch of a set shares its compression; an empty set keeps the default.
+        compression = next((sketch["compression"] for sketch in data.values()), 200)
+        sketch_set = cls(compression)
+        for key, sketch in data.items():
+            sketch_set.sketches[tuple(key.split("|"))] = TDigest.from_dict(sketch)
+        return sketch_set
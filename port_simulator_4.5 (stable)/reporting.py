@@ -0,0 +1,82 @@
+# reporting.py
+"""
+Tables and charts built from a finished run. Kept apart from the engine so that importing
+simulation_processes does not load pandas or plotly.
+"""
+import pandas as pd
+from config_compiler import MODE_NAMES
+from quantile_sketch import ALL
+
+CONTAINER_COLUMNS = [
+    "container_id", "vessel", "container_type", "mode", "vessel_scheduled_arrival", "vessel_arrives",
+    "vessel_berths", "entered_yard", "waiting_for_inland_tsp", "loaded_for_transport", "departed_port",
+]
+
+def create_dataframe(all_containers, vessel_names, container_type_names):
+    """One row per container, with its vessel, type and mode codes decoded to names."""
+    data = []
+    for i, container in enumerate(all_containers):
+        data.append({
+            "container_id": f"C{i+1}",
+            "vessel": vessel_names[container.vessel],
+            "container_type": container_type_names[container.container_type],
+            "mode": MODE_NAMES[container.mode],
+            "vessel_scheduled_arrival": container.vessel_scheduled_arrival,
+            "vessel_arrives": container.vessel_arrives,
+            "vessel_berths": container.vessel_berths,
+            "entered_yard": container.entered_yard,
+            "waiting_for_inland_tsp": container.waiting_for_inland_tsp,
+            "loaded_for_transport": container.loaded_for_transport,
+            "departed_port": container.departed_port
+        })
+    return pd.DataFrame(data, columns=CONTAINER_COLUMNS)
+
+def plot_yard_occupancy(yard_metrics):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for yard_name, occupancy in yard_metrics.items():
+        fig.add_trace(go.Scatter(x=occupancy.times, y=occupancy.values, mode="lines", name=yard_name))
+    fig.update_layout(title="Yard Occupancy per Yard Over Time",
+                      xaxis_title="Time (hours)",
+                      yaxis_title="Occupancy")
+    fig.show()
+
+def checkpoint_box_figure(sketches, checkpoints, title, by=None, groups=(), max_outliers=50):
+    """
+    Horizontal box plot of checkpoint durations drawn from the run's sketches
+    (metrics["sketches"]) instead of one point per container. Without by there is one box per
+    checkpoint; with by ("container_type" or "mode") there is one coloured box per checkpoint
+    and group. Each box sends its five-number summary, mean and at most max_outliers outliers,
+    so the figure's size does not grow with the number of containers.
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import DEFAULT_PLOTLY_COLORS
+    fig = go.Figure()
+    for i, group in enumerate(groups if by else [ALL]):
+        dims = {by: group} if by else {}
+        present = [(name, sketches.get(name, **dims)) for name in checkpoints]
+        present = [(name, sketch) for name, sketch in present if sketch.count]
+        if not present:
+            continue
+        box = {"q1": [], "median": [], "q3": [], "mean": [], "lowerfence": [], "upperfence": []}
+        outlier_x, outlier_y = [], []
+        for name, sketch in present:
+            stats = sketch.box_stats()
+            for key, value in stats.items():
+                box[key] += value
+            outliers = sketch.outliers(stats["lowerfence"][0], stats["upperfence"][0], max_outliers)
+            outlier_x += outliers
+            outlier_y += [name] * len(outliers)
+        label = group if by else "All containers"
+        color = DEFAULT_PLOTLY_COLORS[i % len(DEFAULT_PLOTLY_COLORS)]
+        fig.add_trace(go.Box(y=[name for name, _ in present], orientation="h", name=label,
+                             legendgroup=label, offsetgroup=label, marker_color=color,
+                             showlegend=bool(by), **box))
+        if outlier_x:
+            fig.add_trace(go.Scatter(x=outlier_x, y=outlier_y, mode="markers", orientation="h",
+                                     name=label, legendgroup=label, offsetgroup=label,
+                                     marker=dict(color=color, size=4), showlegend=False))
+    fig.update_layout(title=title, boxmode="group", scattermode="group",
+                      xaxis_title="Time (hours)", yaxis_title="Checkpoint",
+                      yaxis=dict(categoryorder="array", categoryarray=list(checkpoints)[::-1]))
+    return fig
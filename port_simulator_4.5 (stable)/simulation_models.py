@@ -1,12 +1,48 @@
 # simulation_models.py
+import heapq
 import random
+from config_compiler import ROAD
+
+class CodeTable:
+    """
+    Interns labels (vessel names, container types) as small integer codes. A code is the
+    label's index in names, so decoding is a list lookup.
+    """
+    __slots__ = ("names", "_codes")
+
+    def __init__(self, names=()):
+        self.names = []
+        self._codes = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name):
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def __len__(self):
+        return len(self.names)
+
+# Vessel code of the containers already in the yard at the start.
+INITIAL_VESSEL = 0
 
 class Container:
     """
     Represents a container with processing checkpoints, including its type.
+    vessel, mode and container_type are small integer codes: vessel indexes the run's vessel
+    CodeTable, mode is ROAD or RAIL (config_compiler.MODE_NAMES) and container_type is the
+    ContainerTypeParams.code of its type. Slots keep a container at a fraction of the size of
+    an instance with a __dict__.
     """
-    def __init__(self, vessel_name, vessel_scheduled_arrival, vessel_arrives, mode, container_type):
-        self.vessel = vessel_name
+    __slots__ = ("vessel", "vessel_scheduled_arrival", "vessel_arrives", "vessel_berths",
+                 "entered_yard", "waiting_for_inland_tsp", "loaded_for_transport", "departed_port",
+                 "mode", "container_type")
+
+    def __init__(self, vessel, vessel_scheduled_arrival, vessel_arrives, mode, container_type):
+        self.vessel = vessel
         self.vessel_scheduled_arrival = vessel_scheduled_arrival
         self.vessel_arrives = vessel_arrives
         self.vessel_berths = None
@@ -14,58 +50,105 @@ class Container:
         self.waiting_for_inland_tsp = None
         self.loaded_for_transport = None
         self.departed_port = None
-        self.mode = mode  # 'Rail' or 'Road'
-        self.container_type = container_type  # e.g., 'Standard', 'Reefer', 'Hazardous'
+        self.mode = mode
+        self.container_type = container_type
 
 class Vessel:
     """
     Represents a vessel arriving at the port carrying containers.
-    container_counts is a dict mapping container type to count.
-    container_type_params provides type-specific parameters.
+    vessel_params is the compiled VesselParams of the vessel and code its vessel code; loads
+    pairs each ContainerTypeParams with its container count.
     """
-    def __init__(self, env, name, container_counts, day, hour, container_type_params):
+    def __init__(self, env, vessel_params, code):
         self.env = env
-        self.name = name
-        self.container_counts = container_counts
-        self.scheduled_arrival = (day - 1) * 24 + hour
+        self.name = vessel_params.name
+        self.code = code
+        self.container_counts = vessel_params.container_counts
+        self.loads = vessel_params.loads
+        self.scheduled_arrival = vessel_params.scheduled_arrival
         self.actual_arrival = self.scheduled_arrival + random.triangular(-1, 5, 2)
         self.vessel_berths = None
         self.containers = []
-        for container_type, count in container_counts.items():
-            rail_percentage = container_type_params[container_type]['rail_percentage']
-            for _ in range(count):
-                mode = random.choices(['Rail', 'Road'],
-                                      weights=[rail_percentage, 1 - rail_percentage])[0]
+        for type_params, count in vessel_params.loads:
+            for mode in type_params.sample_modes(count):
                 self.containers.append(
                     Container(
-                        self.name,
+                        code,
                         self.scheduled_arrival,
                         self.actual_arrival,
                         mode,
-                        container_type
+                        type_params.code
                     )
                 )
 
 class Yard:
     """
     Manages container storage for a specific container type with capacity constraints.
+    container_type is the type's name and type_code its code on Container records.
+    Containers already in the yard at the start are only counted (initial_road, initial_rail);
+    a Container record is created for them when they depart.
     """
-    def __init__(self, capacity, initial_count):
+    def __init__(self, capacity, initial_road=0, initial_rail=0, container_type=None, type_code=None):
         self.capacity = capacity
+        self.container_type = container_type
+        self.type_code = type_code
         self.containers = []
-        for _ in range(initial_count):
-            container = Container(
-                "Initial",
-                None,
-                None,
-                random.choice(['Rail', 'Road']),
-                None  # container_type will be set later
-            )
-            container.entered_yard = 0
+        # Precomputed crane arrivals not yet in the yard: heap of (entered_yard, seq, container).
+        self.pending = []
+        self._pending_seq = 0
+        self.initial_road = initial_road
+        self.initial_rail = initial_rail
+        # Initial road containers currently being processed at a gate.
+        self.initial_road_claimed = 0
+
+    def occupancy(self):
+        return len(self.containers) + self.initial_road + self.initial_rail
+
+    def claim_initial_road(self):
+        """Take one initial road container for gate processing, if any is left unclaimed."""
+        if self.initial_road_claimed >= self.initial_road:
+            return False
+        self.initial_road_claimed += 1
+        return True
+
+    def depart_initial(self, mode, loaded_for_transport, departed_port):
+        """Remove one initial container of the given mode code and return its departure record."""
+        if mode == ROAD:
+            self.initial_road -= 1
+            self.initial_road_claimed -= 1
+        else:
+            self.initial_rail -= 1
+        container = Container(INITIAL_VESSEL, None, None, mode, self.type_code)
+        container.entered_yard = 0
+        container.waiting_for_inland_tsp = 0
+        container.loaded_for_transport = loaded_for_transport
+        container.departed_port = departed_port
+        return container
+
+    def available(self):
+        """Free slots, counting precomputed arrivals as already reserved."""
+        return self.capacity - self.occupancy() - len(self.pending)
+
+    def schedule_arrivals(self, arrivals):
+        """
+        Reserve space for a batch of future arrivals, given as (entered_yard, container) pairs.
+        The containers join the yard when release_arrivals is called at or after their time.
+        """
+        for entered_yard, container in arrivals:
+            heapq.heappush(self.pending, (entered_yard, self._pending_seq, container))
+            self._pending_seq += 1
+
+    def release_arrivals(self, now):
+        """Move every pending arrival with entered_yard <= now into the yard, in time order."""
+        released = []
+        while self.pending and self.pending[0][0] <= now:
+            _, _, container = heapq.heappop(self.pending)
             self.containers.append(container)
-    
+            released.append(container)
+        return released
+
     def add_container(self, container):
-        if len(self.containers) >= self.capacity:
+        if self.occupancy() + len(self.pending) >= self.capacity:
             print(f"WARNING: Yard capacity ({self.capacity}) exceeded, container not added")
             return False
         self.containers.append(container)
@@ -1,12 +1,28 @@
 # simulation_processes.py
+import csv
 import random
+import numpy as np
 import simpy
-import pandas as pd
-import plotly.graph_objects as go
-from simulation_models import Container, Vessel, Yard
+from simulation_models import CodeTable, Container, Vessel, Yard
+from config_compiler import MODE_NAMES, RAIL, ROAD, compile_config
+from profiling import ProfiledEnvironment
+from memory_diagnostics import MemoryTracker
+from metrics_registry import BinnedCounter, MetricsRegistry
+from quantile_sketch import SketchSet
 
-def vessel_arrival(env, vessel, berths, yards, gates, all_containers, container_type_params,
-                   cumulative_unloaded, cumulative_departures, cranes_per_vessel):
+# Checkpoint durations (hours) of a vessel container, each from one timestamp to a later one.
+CHECKPOINTS = (
+    ("arrival_delay", "vessel_scheduled_arrival", "vessel_arrives"),
+    ("berth_queue", "vessel_arrives", "vessel_berths"),
+    ("unloading_time", "vessel_berths", "entered_yard"),
+    ("yard_waiting_time", "entered_yard", "waiting_for_inland_tsp"),
+    ("loading_queue", "waiting_for_inland_tsp", "loaded_for_transport"),
+    ("loading_time", "loaded_for_transport", "departed_port"),
+    ("total_dwell_time", "vessel_scheduled_arrival", "departed_port"),
+)
+
+def vessel_arrival(env, vessel, berths, yards, gates, all_containers, params,
+                   cumulative_unloaded, cumulative_departures, checkpoint_sketches):
     yield env.timeout(vessel.actual_arrival)
     print(f"{vessel.name} arrives at {env.now:.2f}")
     
@@ -16,8 +32,19 @@ def vessel_arrival(env, vessel, berths, yards, gates, all_containers, container_
         for container in vessel.containers:
             container.vessel_berths = env.now
         print(f"{vessel.name} berths at {env.now:.2f}")
-        
+
+        # Unload times do not depend on the rest of the system, so the whole crane schedule can be
+        # drawn up front and handed to the yards as future arrivals, unless a yard may fill up.
+        fits = all(yards[ct.code].available() >= n for ct, n in vessel.loads if n)
+        if fits:
+            yield env.timeout(schedule_vessel_unload(env, vessel, yards, gates, all_containers,
+                                                     params, cumulative_unloaded, cumulative_departures,
+                                                     checkpoint_sketches))
+            print(f"{vessel.name} unloading complete at {env.now:.2f}")
+            return
+
         # divide work among cranes_per_vessel cranes instead of 4
+        cranes_per_vessel = params.cranes_per_vessel
         total = len(vessel.containers)
         per = total // cranes_per_vessel
         rem = total % cranes_per_vessel
@@ -29,23 +56,84 @@ def vessel_arrival(env, vessel, berths, yards, gates, all_containers, container_
             start += num
             procs.append(env.process(
                 crane_unload(env, slice_, yards, gates, all_containers,
-                            container_type_params, cumulative_unloaded, cumulative_departures)
+                            params, cumulative_unloaded, cumulative_departures, checkpoint_sketches)
             ))
         yield env.all_of(procs)
         print(f"{vessel.name} unloading complete at {env.now:.2f}")
 
-def crane_unload(env, containers, yards, gates, all_containers, container_type_params,
-                 cumulative_unloaded, cumulative_departures):
+def crane_offsets(vessel, params, rng):
+    """
+    Draw every unload time of a vessel at once and return, per container, the hours between
+    berthing and entering the yard. Cranes split the containers exactly like crane_unload does.
+    """
+    types = [ct for ct, n in vessel.loads if n]
+    counts = [n for _, n in vessel.loads if n]
+    low, high, mode = (np.repeat([ct.unload_time[k] for ct in types], counts)
+                       for k in range(3))
+    # numpy's triangular rejects low == high; a constant unload time is just that constant.
+    durations = low.astype(np.float64)
+    varied = low < high
+    if varied.all():
+        durations = rng.triangular(low, mode, high)
+    elif varied.any():
+        durations[varied] = rng.triangular(low[varied], mode[varied], high[varied])
+
+    offsets = np.empty_like(durations)
+    cranes_per_vessel = params.cranes_per_vessel
+    total = len(durations)
+    per = total // cranes_per_vessel
+    rem = total % cranes_per_vessel
+    start = 0
+    for i in range(cranes_per_vessel):
+        num = per + (1 if i < rem else 0)
+        offsets[start:start + num] = np.cumsum(durations[start:start + num])
+        start += num
+    return offsets
+
+def schedule_vessel_unload(env, vessel, yards, gates, all_containers, params,
+                           cumulative_unloaded, cumulative_departures, checkpoint_sketches):
+    """
+    Precomputed unloading: stamp entered_yard on every container, reserve the arrivals in their
+    yards and start the road departures with a delay. Returns the time the last crane finishes.
+    """
+    if not vessel.containers:
+        return 0
+    rng = np.random.default_rng(random.getrandbits(64))
+    offsets = crane_offsets(vessel, params, rng)
+    arrivals = {code: [] for code in yards}
+    for i in np.argsort(offsets, kind="stable").tolist():
+        container = vessel.containers[i]
+        offset = float(offsets[i])
+        # env.now + offset is exactly the clock value a timeout(offset) started now will wake at.
+        container.entered_yard = env.now + offset
+        arrivals[container.container_type].append((container.entered_yard, container))
+        if container.mode == ROAD:
+            yard = yards[container.container_type]
+            env.process(delayed_truck_departure(env, offset, container, yard, gates, all_containers,
+                                                params, cumulative_unloaded, cumulative_departures,
+                                                checkpoint_sketches))
+        else:
+            container.waiting_for_inland_tsp = container.entered_yard
+    for code, batch in arrivals.items():
+        if batch:
+            yards[code].schedule_arrivals(batch)
+    type_codes = np.fromiter((c.container_type for c in vessel.containers), dtype=np.int64,
+                             count=len(vessel.containers))
+    cumulative_unloaded.add_many(env.now + offsets, type_codes)
+    return float(offsets.max())
+
+def crane_unload(env, containers, yards, gates, all_containers, params,
+                 cumulative_unloaded, cumulative_departures, checkpoint_sketches):
     for container in containers:
-        unload_low, unload_high, unload_mode = container_type_params[container.container_type]['unload_time']
-        unload_time = random.triangular(unload_low, unload_high, unload_mode)
-        yield env.timeout(unload_time)
+        type_params = params.container_types[container.container_type]
+        yield env.timeout(type_params.sample_unload_time())
         container.entered_yard = env.now
-        cumulative_unloaded.append((env.now, container.container_type))
+        cumulative_unloaded.add(env.now, container.container_type)
         yard = yards[container.container_type]
         if yard.add_container(container):
             env.process(truck_departure_process(env, container, yard, gates, all_containers,
-                                            container_type_params, cumulative_unloaded, cumulative_departures))
+                                            params, cumulative_unloaded, cumulative_departures,
+                                            checkpoint_sketches))
 
 def is_gate_open(time):
     hour = time % 24
@@ -61,10 +149,18 @@ def next_gate_opening(current_time):
     else:
         return current_time
 
-def truck_departure_process(env, container, yard, gates, all_containers, container_type_params,
-                        cumulative_unloaded, cumulative_departures):
+def record_checkpoints(sketches, container, params):
+    """Add a departed vessel container's checkpoint durations to the sketches, by type and mode."""
+    type_name = params.container_types[container.container_type].name
+    mode_name = MODE_NAMES[container.mode]
+    for name, start, end in CHECKPOINTS:
+        sketches.add(name, getattr(container, end) - getattr(container, start), type_name, mode_name)
+
+def truck_departure_process(env, container, yard, gates, all_containers, params,
+                        cumulative_unloaded, cumulative_departures, checkpoint_sketches):
     container.waiting_for_inland_tsp = env.now
-    if container.mode == "Road":
+    if container.mode == ROAD:
+        sample_process_time = params.container_types[container.container_type].sample_truck_process_time
         while container.departed_port is None:
             if not is_gate_open(env.now):
                 next_open = next_gate_opening(env.now)
@@ -75,159 +171,293 @@ def truck_departure_process(env, container, yard, gates, all_containers, contain
                 if not is_gate_open(env.now):
                     continue
                 container.loaded_for_transport = env.now
-                proc_low, proc_high, proc_mode = container_type_params[container.container_type]['truck_process_time']
-                process_time = random.triangular(proc_low, proc_high, proc_mode)
-                yield env.timeout(process_time)
+                yield env.timeout(sample_process_time())
                 if is_gate_open(env.now):
                     container.departed_port = env.now
                     yard.remove_container(container)
                     all_containers.append(container)
-                    cumulative_departures.append((env.now, container.mode, container.container_type))
+                    cumulative_departures.add(env.now, ROAD, container.container_type)
+                    record_checkpoints(checkpoint_sketches, container, params)
     # Rail containers will be handled in train_departure_process
 
-def train_departure_process(env, yards, gates, all_containers, cumulative_departures,
-                            trains_per_day, train_capacity):
-    interval = 24.0 / trains_per_day
+def next_initial_road_yard(yards):
+    return next((y for y in yards.values() if y.initial_road_claimed < y.initial_road), None)
+
+def initial_road_departures(env, yards, gates, all_containers, params, cumulative_departures):
+    """
+    Gate worker for the road containers already in the yard at the start. One worker per gate
+    drains the yards' initial_road backlogs in yard order. Each worker takes its gate at t=0 and
+    keeps it, through the closed hours too, until the backlog is empty. So vessel trucks queue
+    behind the backlog at every reopening, as they did when every initial container queued for
+    a gate at t=0.
+    """
+    if next_initial_road_yard(yards) is None:
+        return
+    with gates.request() as req:
+        yield req
+        while True:
+            if not is_gate_open(env.now):
+                yield env.timeout(next_gate_opening(env.now) - env.now)
+                continue
+            yard = next_initial_road_yard(yards)
+            if yard is None:
+                break
+            yard.claim_initial_road()
+            loaded_for_transport = env.now
+            yield env.timeout(params.container_types[yard.type_code].sample_truck_process_time())
+            if is_gate_open(env.now):
+                all_containers.append(yard.depart_initial(ROAD, loaded_for_transport, env.now))
+                cumulative_departures.add(env.now, ROAD, yard.type_code)
+            else:
+                yard.initial_road_claimed -= 1
+
+def delayed_truck_departure(env, delay, container, yard, gates, all_containers, params,
+                            cumulative_unloaded, cumulative_departures, checkpoint_sketches):
+    yield env.timeout(delay)
+    yard.release_arrivals(env.now)
+    yield from truck_departure_process(env, container, yard, gates, all_containers,
+                                       params, cumulative_unloaded, cumulative_departures, checkpoint_sketches)
+
+def train_departure_process(env, yards, gates, all_containers, cumulative_departures, params,
+                            checkpoint_sketches):
+    interval = params.train_interval
+    train_capacity = params.train_capacity
     while True:
         yield env.timeout(interval)
+        for yard in yards.values():
+            yard.release_arrivals(env.now)
         ready = sorted(
             [c for yard in yards.values() for c in yard.containers
-             if c.mode=="Rail" and c.waiting_for_inland_tsp is not None and c.departed_port is None],
+             if c.mode == RAIL and c.waiting_for_inland_tsp is not None and c.departed_port is None],
             key=lambda c: c.waiting_for_inland_tsp
         )
         batch = ready[:train_capacity]
-        if not batch:
+        # Initial containers have waited since t=0, so they board first.
+        initial = {}
+        room = train_capacity
+        for code, yard in yards.items():
+            initial[code] = min(room, yard.initial_rail)
+            room -= initial[code]
+        batch = batch[:room]
+        if not batch and not any(initial.values()):
             continue
         # simulate load time
         yield env.timeout(2)
+        for code, count in initial.items():
+            yard = yards[code]
+            for _ in range(count):
+                all_containers.append(yard.depart_initial(RAIL, env.now, env.now))
+            cumulative_departures.add(env.now, RAIL, code, count=count)
         for c in batch:
             c.loaded_for_transport = env.now
             c.departed_port = env.now
-            yards[c.container_type].remove_container(c)
+            yard = yards[c.container_type]
+            yard.remove_container(c)
             all_containers.append(c)
-            cumulative_departures.append((env.now, c.mode, c.container_type))
-        print(f"Train departed at {env.now:.2f} with {len(batch)} containers")
+            cumulative_departures.add(env.now, RAIL, c.container_type)
+            record_checkpoints(checkpoint_sketches, c, params)
+        print(f"Train departed at {env.now:.2f} with {len(batch) + sum(initial.values())} containers")
 
 def monitor(env, yards, metrics):
     while True:
-        total_occupancy = sum(len(yard.containers) for yard in yards.values())
+        for yard in yards.values():
+            yard.release_arrivals(env.now)
+        total_occupancy = sum(yard.occupancy() for yard in yards.values())
         truck_waiting = sum(len([c for c in yard.containers 
-                                  if c.mode == "Road" and c.waiting_for_inland_tsp is not None and c.departed_port is None])
+                                  if c.mode == ROAD and c.waiting_for_inland_tsp is not None and c.departed_port is None])
                              for yard in yards.values())
+        truck_waiting += sum(yard.initial_road for yard in yards.values())
         rail_waiting = sum(len([c for c in yard.containers 
-                                 if c.mode == "Rail" and c.waiting_for_inland_tsp is not None and c.departed_port is None])
+                                 if c.mode == RAIL and c.waiting_for_inland_tsp is not None and c.departed_port is None])
                             for yard in yards.values())
-        gate_status = "Open" if is_gate_open(env.now) else "Closed"
+        rail_waiting += sum(yard.initial_rail for yard in yards.values())
+        gate_open = is_gate_open(env.now)
         
-        metrics['yard_occupancy'].append((env.now, total_occupancy))
-        metrics['truck_queue'].append((env.now, truck_waiting))
-        metrics['rail_queue'].append((env.now, rail_waiting))
-        metrics['gate_status'].append((env.now, gate_status))
+        metrics['yard_occupancy'].append(env.now, total_occupancy)
+        metrics['truck_queue'].append(env.now, truck_waiting)
+        metrics['rail_queue'].append(env.now, rail_waiting)
+        metrics['gate_open'].append(env.now, gate_open)
         
         if env.now % 12 < 1:
             print(f"Time: {env.now:.2f} | Total Yard: {total_occupancy} | Truck Queue: {truck_waiting} | "
-                  f"Rail Queue: {rail_waiting} | Gates: {gate_status}")
+                  f"Rail Queue: {rail_waiting} | Gates: {'Open' if gate_open else 'Closed'}")
         yield env.timeout(1)
 
 def monitor_yard_occupancy(env, yards, yard_metrics):
     while True:
-        for yard_name, yard in yards.items():
-            yard_metrics[yard_name].append((env.now, len(yard.containers)))
+        for yard in yards.values():
+            yard.release_arrivals(env.now)
+            yard_metrics[yard.container_type].append(env.now, yard.occupancy())
         yield env.timeout(1)
 
-def create_dataframe(all_containers):
-    data = []
-    for i, container in enumerate(all_containers):
-        data.append({
-            "container_id": f"C{i+1}",
-            "vessel": container.vessel,
-            "container_type": container.container_type,
-            "mode": container.mode,
-            "vessel_scheduled_arrival": container.vessel_scheduled_arrival,
-            "vessel_arrives": container.vessel_arrives,
-            "vessel_berths": container.vessel_berths,
-            "entered_yard": container.entered_yard,
-            "waiting_for_inland_tsp": container.waiting_for_inland_tsp,
-            "loaded_for_transport": container.loaded_for_transport,
-            "departed_port": container.departed_port
-        })
-    return pd.DataFrame(data)
-
-def plot_yard_occupancy(yard_metrics):
-    fig = go.Figure()
-    for yard_name, occupancy_data in yard_metrics.items():
-        times = [t for t, occ in occupancy_data]
-        occs = [occ for t, occ in occupancy_data]
-        fig.add_trace(go.Scatter(x=times, y=occs, mode="lines", name=yard_name))
-    fig.update_layout(title="Yard Occupancy per Yard Over Time",
-                      xaxis_title="Time (hours)",
-                      yaxis_title="Occupancy")
-    fig.show()
-
-def run_simulation(config, progress_callback=None):
+def load_yard_inventory(path):
+    """
+    Read a yard inventory CSV with columns container_type, mode and an optional count
+    (one container per row when count is absent). Returns {container_type: {mode: count}}.
+    """
+    inventory = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            mode = row["mode"].strip().capitalize()
+            if mode not in ("Rail", "Road"):
+                raise ValueError(f"Unknown mode {row['mode']!r} in yard inventory {path}")
+            counts = inventory.setdefault(row["container_type"].strip(), {"Rail": 0, "Road": 0})
+            counts[mode] += int(row.get("count") or 1)
+    return inventory
+
+def initial_yard_counts(params, inventory_path=None):
+    """
+    Number of initial (road, rail) containers per type, from the yard inventory CSV at
+    inventory_path if given, otherwise initial_yard_fill with modes drawn according to
+    rail_percentage.
+    """
+    if inventory_path:
+        inventory = load_yard_inventory(inventory_path)
+        unknown = sorted(set(inventory) - {ct.name for ct in params.container_types})
+        if unknown:
+            raise ValueError(f"Unknown container type(s) {', '.join(map(repr, unknown))} "
+                             f"in yard inventory {inventory_path}")
+        counts = {}
+        for ct in params.container_types:
+            type_counts = inventory.get(ct.name, {"Rail": 0, "Road": 0})
+            if type_counts["Rail"] + type_counts["Road"] > ct.yard_capacity:
+                raise ValueError(f"Yard inventory for {ct.name} exceeds its yard capacity")
+            counts[ct.name] = (type_counts["Road"], type_counts["Rail"])
+        return counts
+
+    rng = np.random.default_rng(random.getrandbits(64))
+    counts = {}
+    for ct in params.container_types:
+        initial_count = int(ct.yard_capacity * ct.initial_yard_fill)
+        rail = int(rng.binomial(initial_count, ct.rail_percentage))
+        counts[ct.name] = (initial_count - rail, rail)
+    return counts
+
+def run_simulation(config, progress_callback=None, dataframe=True):
+    """
+    Run one simulation and return (df, metrics, yard_metrics). With dataframe=False the first
+    item is the list of departed Container records instead, and pandas is never imported;
+    metrics["code_tables"] decodes their vessel, container_type and mode codes.
+    The config is validated by compile_config before anything runs.
+    """
+    params = compile_config(config)
     # seed RNG if provided
-    if config.get("random_seed") is not None:
-        random.seed(config["random_seed"])
+    if params.random_seed is not None:
+        random.seed(params.random_seed)
 
-    env = simpy.Environment()
-    berths = simpy.Resource(env, capacity=config["berth_count"])
-    gates  = simpy.Resource(env, capacity=config["gate_count"])
+    # Opt-in per-process profiling; the plain environment is used otherwise.
+    env = ProfiledEnvironment() if config.get("profile") else simpy.Environment()
+    # Opt-in memory accounting at setup, every memory_snapshot_interval hours and after the dataframe.
+    memory = MemoryTracker() if config.get("memory_diagnostics") else None
+    berths = simpy.Resource(env, capacity=params.berth_count)
+    gates  = simpy.Resource(env, capacity=params.gate_count)
     
-    container_type_params = {ct["name"]: ct for ct in config["container_types"]}
-    yards = {}
-    for ct in config["container_types"]:
-        name = ct["name"]
-        capacity = ct["yard_capacity"]
-        initial_count = int(capacity * ct.get("initial_yard_fill", 0))
-        yards[name] = Yard(capacity, initial_count)
-        for container in yards[name].containers:
-            container.container_type = name
+    yards = {}  # keyed by container type code
+    initial_counts = initial_yard_counts(params, config.get("initial_yard_inventory"))
+    for ct in params.container_types:
+        initial_road, initial_rail = initial_counts[ct.name]
+        yards[ct.code] = Yard(ct.yard_capacity, initial_road, initial_rail, ct.name, ct.code)
     
+    # Hourly samples in NumPy arrays; metrics_max_samples keeps only the latest samples of each.
+    registry = MetricsRegistry(config.get("metrics_max_samples"))
     metrics = {
-        "yard_occupancy": [],
-        "truck_queue": [],
-        "rail_queue": [],
-        "gate_status": []
+        "yard_occupancy": registry.series("yard_occupancy"),
+        "truck_queue": registry.series("truck_queue"),
+        "rail_queue": registry.series("rail_queue"),
+        "gate_open": registry.series("gate_open", np.bool_),
+        "registry": registry
     }
     all_containers = []
-    yard_metrics = {yard_name: [] for yard_name in yards.keys()}
-    cumulative_unloaded = []      # (time, container_type)
-    cumulative_departures = []    # (time, mode, container_type)
+    yard_metrics = {yard.container_type: registry.series(f"occupancy_{yard.container_type}")
+                    for yard in yards.values()}
+    # Unloads and departures counted per counter_resolution bin, by type (and mode).
+    type_names = [ct.name for ct in params.container_types]
+    cumulative_unloaded = BinnedCounter(params.simulation_duration, params.counter_resolution,
+                                        [("container_type", type_names)])
+    cumulative_departures = BinnedCounter(params.simulation_duration, params.counter_resolution,
+                                          [("mode", MODE_NAMES), ("container_type", type_names)])
+    # Checkpoint durations of departed vessel containers, summarised online by type and mode.
+    checkpoint_sketches = SketchSet()
     
     # start monitors
     env.process(monitor(env, yards, metrics))
     env.process(monitor_yard_occupancy(env, yards, yard_metrics))
-    # pass new params into train process
     env.process(train_departure_process(
-        env, yards, gates, all_containers, cumulative_departures,
-        config["trains_per_day"], config["train_capacity"]
+        env, yards, gates, all_containers, cumulative_departures, params, checkpoint_sketches
     ))
 
-    # vessel arrivals: pass cranes_per_vessel
-    for v in config["vessels"]:
-        vessel = Vessel(env, v["name"], v["container_counts"], v["day"], v["hour"], container_type_params)
+    vessels = []
+    vessel_names = CodeTable(["Initial"])  # code 0 is simulation_models.INITIAL_VESSEL
+    for vessel_params in params.vessels:
+        vessel = Vessel(env, vessel_params, vessel_names.code(vessel_params.name))
+        vessels.append(vessel)
         env.process(vessel_arrival(
             env, vessel, berths, yards, gates, all_containers,
-            container_type_params, cumulative_unloaded, cumulative_departures,
-            config["cranes_per_vessel"]
+            params, cumulative_unloaded, cumulative_departures, checkpoint_sketches
         ))
     
-    for yard in yards.values():
-        for container in yard.containers[:]:
-            env.process(truck_departure_process(env, container, yard, gates, all_containers,
-                                            container_type_params, cumulative_unloaded, cumulative_departures))
+    initial_road = sum(yard.initial_road for yard in yards.values())
+    for _ in range(min(params.gate_count, initial_road)):
+        env.process(initial_road_departures(env, yards, gates, all_containers,
+                                            params, cumulative_departures))
     
-    duration = config.get("simulation_duration", 48)
+    def memory_structures():
+        return {
+            "all_containers": all_containers,
+            "yard.containers": {yard.container_type: yard.containers for yard in yards.values()},
+            "yard.pending": {yard.container_type: yard.pending for yard in yards.values()},
+            "vessel.containers": [vessel.containers for vessel in vessels],
+            "cumulative_unloaded": cumulative_unloaded,
+            "cumulative_departures": cumulative_departures,
+            "checkpoint_sketches": checkpoint_sketches,
+            "metrics": metrics,
+            "yard_metrics": yard_metrics,
+        }
+
+    container_count = (sum(len(vessel.containers) for vessel in vessels)
+                       + sum(yard.initial_road + yard.initial_rail for yard in yards.values()))
+    if memory:
+        memory.snapshot("setup", memory_structures(), container_count, env)
+
+    duration = params.simulation_duration
+    snapshot_interval = config.get("memory_snapshot_interval", 24)
     # Run simulation in 1-hour increments to update progress.
     for t in range(1, duration + 1):
         env.run(until=t)
         if progress_callback:
             progress_callback(t / duration)
+        if memory and t % snapshot_interval == 0:
+            memory.snapshot(f"t={t}h", memory_structures(), container_count, env)
     
-    df = create_dataframe(all_containers)
+    if config.get("profile"):
+        env.print_report()
+        if config.get("profile_output"):
+            env.write_report(config["profile_output"])
+
+    if dataframe:
+        from reporting import create_dataframe
+        df = create_dataframe(all_containers, vessel_names.names, type_names)
+    else:
+        df = all_containers
     print(f"\nSimulation processed {len(all_containers)} containers.")
+    if memory:
+        known_sizes = {"dataframe": int(df.memory_usage(deep=True).sum())} if dataframe else None
+        memory.snapshot("dataframe" if dataframe else "end", memory_structures(), container_count, env,
+                        known_sizes=known_sizes)
+        memory.stop()
+        memory.print_report()
+        if config.get("memory_output"):
+            memory.write_report(config["memory_output"])
     
     metrics["cumulative_unloaded"] = cumulative_unloaded
     metrics["cumulative_departures"] = cumulative_departures
+    metrics["sketches"] = checkpoint_sketches
+    metrics["code_tables"] = {
+        "vessel": vessel_names.names,
+        "container_type": type_names,
+        "mode": list(MODE_NAMES),
+    }
+    if memory:
+        metrics["memory"] = memory.snapshots
     
     return df, metrics, yard_metrics
\ No newline at end of file
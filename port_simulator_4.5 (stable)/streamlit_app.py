@@ -1,8 +1,10 @@
 import streamlit as st
 import json
-import pandas as pd
-import plotly.express as px
-from simulation_processes import run_simulation
+import plotly.graph_objects as go
+from simulation_processes import CHECKPOINTS, run_simulation
+from reporting import checkpoint_box_figure
+from chart_data import DEFAULT_MAX_POINTS, counter_series, line_traces
+from config_compiler import ConfigError, compile_config
 from config import default_config
 
 # Use entire screen layout.
@@ -131,6 +133,11 @@ config = {
 }
 
 if st.button("Run Simulation"):
+    try:
+        compile_config(config)
+    except ConfigError as exc:
+        st.error(str(exc))
+        st.stop()
     progress_bar = st.progress(0)
     
     def update_progress(progress):
@@ -139,6 +146,18 @@ if st.button("Run Simulation"):
     st.write("Running simulation...")
     df, metrics, yard_metrics = run_simulation(config, progress_callback=update_progress)
     st.write("Simulation complete!")
+    # Kept across reruns so that moving the chart window redraws without running again.
+    st.session_state["results"] = (config, df, metrics, yard_metrics)
+
+if "results" in st.session_state:
+    run_config, df, metrics, yard_metrics = st.session_state["results"]
+
+    # Line charts show the chosen window, downsampled to about max_points points per line.
+    st.subheader("Chart Window")
+    duration = float(run_config["simulation_duration"])
+    window = st.slider("Time window (hours)", 0.0, duration, (0.0, duration), step=1.0)
+    max_points = st.number_input("Points per line", min_value=100, max_value=20000,
+                                 value=DEFAULT_MAX_POINTS, step=100)
     
     # ---------------------
     # Visualizations Area
@@ -146,84 +165,50 @@ if st.button("Run Simulation"):
     
     # Checkpoint Distributions in a Single Plot (Horizontal Boxplot) with Container Type Colors
     with st.expander("Checkpoints", expanded=True):
-        df_cp = df[df.vessel != "Initial"].copy()
-        df_cp["arrival_delay"] = df_cp["vessel_arrives"] - df_cp["vessel_scheduled_arrival"]
-        df_cp["berth_queue"] = df_cp["vessel_berths"] - df_cp["vessel_arrives"]
-        df_cp["unloading_time"] = df_cp["entered_yard"] - df_cp["vessel_berths"]
-        df_cp["yard_waiting_time"] = df_cp["waiting_for_inland_tsp"] - df_cp["entered_yard"]
-        df_cp["loading_queue"] = df_cp["loaded_for_transport"] - df_cp["waiting_for_inland_tsp"]
-        df_cp["loading_time"] = df_cp["departed_port"] - df_cp["loaded_for_transport"]
-        df_cp["total_dwell_time"] = df_cp["departed_port"] - df_cp["vessel_scheduled_arrival"]
+        # Boxes come from the engine's checkpoint sketches: a fixed-size summary per box,
+        # whatever the number of containers.
+        checkpoint_order = [name for name, _, _ in CHECKPOINTS]
+        sketches = metrics["sketches"]
+        code_tables = metrics["code_tables"]
 
-        # Melt the checkpoint columns into a single DataFrame for plotting
-        checkpoint_df = df_cp.melt(
-            id_vars=["vessel", "container_type", "mode"],
-            value_vars=["arrival_delay", "berth_queue", "unloading_time", "yard_waiting_time", "loading_queue", "loading_time", "total_dwell_time"],
-            var_name="Checkpoint",
-            value_name="Time"
-        )
-
-        # Define the desired order of checkpoints
-        checkpoint_order = ["arrival_delay", "berth_queue", "unloading_time", "yard_waiting_time", "loading_queue", "loading_time", "total_dwell_time"]
-        
         # 1. Figure for All Containers (No additional color grouping)
         st.subheader("Checkpoint Distributions for All Containers")
-        fig_all = px.box(
-            checkpoint_df,
-            x="Time",
-            y="Checkpoint",
-            orientation='h',
-            category_orders={"Checkpoint": checkpoint_order},
-            title="Checkpoint Distributions (All Containers)",
-            labels={"Time": "Time (hours)", "Checkpoint": "Checkpoint"}
-        )
+        fig_all = checkpoint_box_figure(sketches, checkpoint_order,
+                                        "Checkpoint Distributions (All Containers)")
         st.plotly_chart(fig_all, use_container_width=True)
 
         # 2. Figure with Container Types as Color
         st.subheader("Checkpoint Distributions Colored by Container Type")
-        fig_cp_by_type = px.box(
-            checkpoint_df,
-            x="Time",
-            y="Checkpoint",
-            orientation='h',
-            color="container_type",  # Color by container type
-            category_orders={"Checkpoint": checkpoint_order},
-            title="Checkpoint Distributions by Container Type",
-            labels={"Time": "Time (hours)", "Checkpoint": "Checkpoint", "container_type": "Container Type"}
-        )
+        fig_cp_by_type = checkpoint_box_figure(sketches, checkpoint_order,
+                                               "Checkpoint Distributions by Container Type",
+                                               by="container_type", groups=code_tables["container_type"])
         st.plotly_chart(fig_cp_by_type, use_container_width=True)
 
         # 3. Figure with Transportation Modes as Color
         st.subheader("Checkpoint Distributions Colored by Transportation Mode")
-        fig_cp_by_mode = px.box(
-            checkpoint_df,
-            x="Time",
-            y="Checkpoint",
-            orientation='h',
-            color="mode",  # Color by transportation mode
-            category_orders={"Checkpoint": checkpoint_order},
-            title="Checkpoint Distributions by Transportation Mode",
-            labels={"Time": "Time (hours)", "Checkpoint": "Checkpoint", "mode": "Mode"}
-        )
+        fig_cp_by_mode = checkpoint_box_figure(sketches, checkpoint_order,
+                                               "Checkpoint Distributions by Transportation Mode",
+                                               by="mode", groups=code_tables["mode"])
         st.plotly_chart(fig_cp_by_mode, use_container_width=True)
     
     # Yard Occupancy Visuals
     with st.expander("Yard Occupancy", expanded=False):
         st.subheader("Total Yard Occupancy Over Time")
-        occ_data = pd.DataFrame(metrics["yard_occupancy"], columns=["Time", "Occupancy"])
-        fig1 = px.line(occ_data, x="Time", y="Occupancy",
-                       title="Total Yard Occupancy Over Time",
-                       labels={"Time": "Time (hours)", "Occupancy": "Total Occupancy"})
+        occupancy = metrics["yard_occupancy"]
+        fig1 = go.Figure(line_traces([("Total Occupancy", occupancy.times, occupancy.values)],
+                                     max_points, window))
+        fig1.update_layout(title="Total Yard Occupancy Over Time", xaxis_range=window,
+                           xaxis_title="Time (hours)", yaxis_title="Total Occupancy")
         st.plotly_chart(fig1, use_container_width=True)
         
         st.subheader("Yard Occupancy per Container Category")
-        fig2 = px.line()
-        for ct in config["container_types"]:
+        fig2 = go.Figure(line_traces([(f"{ct['name']} Occupancy", yard_metrics[ct["name"]].times,
+                                       yard_metrics[ct["name"]].values)
+                                      for ct in run_config["container_types"]], max_points, window))
+        for ct in run_config["container_types"]:
             cat = ct["name"]
-            data = pd.DataFrame(yard_metrics[cat], columns=["Time", "Occupancy"])
-            fig2.add_scatter(x=data["Time"], y=data["Occupancy"], mode="lines", name=f"{cat} Occupancy")
             fig2.add_hline(y=ct["yard_capacity"], line_dash="dash", annotation_text=f"{cat} Capacity")
-        fig2.update_layout(title="Yard Occupancy per Container Category Over Time",
+        fig2.update_layout(title="Yard Occupancy per Container Category Over Time", xaxis_range=window,
                            xaxis_title="Time (hours)",
                            yaxis_title="Occupancy")
         st.plotly_chart(fig2, use_container_width=True)
@@ -231,28 +216,29 @@ if st.button("Run Simulation"):
     # Unloading Visuals
     with st.expander("Unloading", expanded=False):
         st.subheader("Cumulative Unloaded Containers Over Time")
-        unload_df = pd.DataFrame(metrics["cumulative_unloaded"], columns=["Time", "Container_Type"])
-        unload_df["Cumulative"] = unload_df.groupby("Container_Type").cumcount() + 1
-        fig3 = px.line(unload_df, x="Time", y="Cumulative", color="Container_Type",
-                       title="Cumulative Unloaded Containers Over Time",
-                       labels={"Time": "Time (hours)", "Cumulative": "Cumulative Unloaded"})
+        fig3 = go.Figure(line_traces(counter_series(metrics["cumulative_unloaded"], "container_type"),
+                                     max_points, window))
+        fig3.update_layout(title="Cumulative Unloaded Containers Over Time", xaxis_range=window,
+                           xaxis_title="Time (hours)", yaxis_title="Cumulative Unloaded",
+                           legend_title="Container Type")
         st.plotly_chart(fig3, use_container_width=True)
     
     # Departures Visuals
     with st.expander("Departures", expanded=False):
         st.subheader("Cumulative Departures Over Time by Mode")
-        dep_df = pd.DataFrame(metrics["cumulative_departures"], columns=["Time", "Mode", "Container_Type"])
-        dep_df["Cumulative"] = dep_df.groupby("Mode").cumcount() + 1
-        fig4 = px.line(dep_df, x="Time", y="Cumulative", color="Mode",
-                       title="Cumulative Departures Over Time by Mode",
-                       labels={"Time": "Time (hours)", "Cumulative": "Cumulative Departures"})
+        fig4 = go.Figure(line_traces(counter_series(metrics["cumulative_departures"], "mode"),
+                                     max_points, window))
+        fig4.update_layout(title="Cumulative Departures Over Time by Mode", xaxis_range=window,
+                           xaxis_title="Time (hours)", yaxis_title="Cumulative Departures",
+                           legend_title="Mode")
         st.plotly_chart(fig4, use_container_width=True)
         
         st.subheader("Cumulative Departures Over Time per Container Type")
-        dep_df["Cumulative_Type"] = dep_df.groupby("Container_Type").cumcount() + 1
-        fig5 = px.line(dep_df, x="Time", y="Cumulative_Type", color="Container_Type",
-                       title="Cumulative Departures Over Time per Container Type",
-                       labels={"Time": "Time (hours)", "Cumulative_Type": "Cumulative Departures"})
+        fig5 = go.Figure(line_traces(counter_series(metrics["cumulative_departures"], "container_type"),
+                                     max_points, window))
+        fig5.update_layout(title="Cumulative Departures Over Time per Container Type", xaxis_range=window,
+                           xaxis_title="Time (hours)", yaxis_title="Cumulative Departures",
+                           legend_title="Container Type")
         st.plotly_chart(fig5, use_container_width=True)
     
     with st.expander("Container-Level data (dataset)", expanded=False):